@@ -4,9 +4,15 @@
 import micropython
 from micropython import const
 import array
+import os
+import struct
+import time
+import math
+from collections import namedtuple
 
+from machine import Pin
 from sensor_pack_2 import bus_service
-from sensor_pack_2.base_sensor import DeviceEx, check_value
+from sensor_pack_2.base_sensor import DeviceEx, Iterator, Reg, RegisterMap, check_value
 from sensor_pack_2.bmp_common import IBaseAirPresSensor, OversamplingCoeff, MeasChannels, SensorID, SensorMode
 
 # ВНИМАНИЕ: не подключайте питание датчика к 5В, иначе датчик выйдет из строя! Только 3.3В!!!
@@ -20,47 +26,306 @@ _REG_ID = const(0xD0)
 _REG_SOFT_RESET = const(0xE0)
 _REG_CTRL = const(0xF4)
 _REG_OUT_MSB = const(0xF6)
+_REG_CALIB = const(0xAA)  # начало блока калибровочных коэффициентов (0xAA..0xBF)
+# карта регистров BMP180 (big endian)
+_ID = Reg("ID", _REG_ID)
+_SOFT_RESET = Reg("SOFT_RESET", _REG_SOFT_RESET)
+_CTRL = Reg("CTRL_MEAS", _REG_CTRL)
+_OUT_T = Reg("OUT_T", _REG_OUT_MSB, 2)  # OUT_MSB, OUT_LSB: UT
+_OUT_P = Reg("OUT_P", _REG_OUT_MSB, 3)  # OUT_MSB, OUT_LSB, OUT_XLSB: UP << (8 - OSS)
+# калибровочные коэффициенты: AC1..AC3 (знаковые), AC4..AC6 (беззнаковые), B1, B2, MB, MC, MD (знаковые)
+_CALIB_NAMES = ("AC1", "AC2", "AC3", "AC4", "AC5", "AC6", "B1", "B2", "MB", "MC", "MD")
+_REGISTERS = (_ID, _SOFT_RESET, _CTRL, _OUT_T, _OUT_P) + tuple(
+    Reg(name, _REG_CALIB + 2 * index, 2, index not in (3, 4, 5)) for index, name in enumerate(_CALIB_NAMES))
+# файл кэша калибровки (см. Bmp180.__init__, cache_file): сигнатура, версия, адрес на шине, chip_id,
+# 11 коэффициентов, 7 предварительно вычисленных значений (_precalc), контрольная сумма (Fletcher-16)
+_CACHE_MAGIC = b"B180"
+_CACHE_VERSION = const(2)
+_CACHE_FMT = "<4sBBB11l7d"
+_CACHE_CRC_FMT = "<H"
 _PRESSURE_MEAS = const(0x14)
 _TEMPERATURE_MEAS = const(0x0E)
-
-def _calibration_regs_addr() -> iter:
-    """возвращает итератор с адресами внутренних регистров датчика, хранящих калибровочные коэффициенты."""
-    return range(0xAA, 0xBF, 2)
-
-
-class Bmp180(IBaseAirPresSensor):
+# состояния конечного автомата потокового режима (poll/__next__)
+_ST_IDLE = const(0)     # преобразование не запущено
+_ST_TEMP = const(1)     # ожидание результата измерения температуры
+_ST_PRESS = const(2)    # ожидание результата измерения давления
+_EOC_WAIT_US = const(100)   # период проверки флага EOC при блокирующем ожидании, мкс
+
+# измерение итератора, poll и set_eoc_callback; timestamp - значение time.ticks_ms() момента считывания.
+# Отдельный тип, а не MeasuredParams пакета sensor_pack_2: его используют и другие драйверы
+TimedParams = namedtuple("TimedParams", "temperature pressure timestamp")
+# результат пакетного (burst) измерения, смотри Bmp180.burst
+BurstResult = namedtuple("BurstResult",
+                         "pressure temperature count oss raw_mean raw_std noise_pa resolution_pa elapsed_us pa_sqrt_ms")
+# статистика программного режима NORMAL (см. Bmp180.get_normal_stats)
+NormalStats = namedtuple("NormalStats", "samples rate_hz jitter_us max_jitter_us overruns")
+
+
+def _fletcher16(data) -> int:
+    """Контрольная сумма Fletcher-16 для защиты файла кэша калибровки."""
+    sum1, sum2 = 0, 0
+    for b in data:
+        sum1 = (sum1 + b) % 255
+        sum2 = (sum2 + sum1) % 255
+    return (sum2 << 8) | sum1
+
+
+def _remove_file(file_name: str):
+    """Удаляет файл; ошибка файловой системы (нет файла, только чтение) не является ошибкой драйвера."""
+    try:
+        os.remove(file_name)
+    except OSError:
+        pass
+
+
+# план компенсации: кортеж всех производных констант для пары (калибровка, OSS), смотри _build_plan.
+# Индексы элементов плана:
+_P_TMP0 = const(0)      # AC5 / 2**15
+_P_TMP1 = const(1)      # MC * 2**11
+_P_AC6 = const(2)       # AC6
+_P_MD = const(3)        # MD
+_P_PRESS0 = const(4)    # B2 / 2**23
+_P_PRESS1 = const(5)    # AC2 / 2**11
+_P_AC1X4 = const(6)     # AC1 * 4
+_P_POW_OSS = const(7)   # 2**OSS
+_P_PRESS2 = const(8)    # AC3 / 2**13
+_P_PRESS3 = const(9)    # B1 / 2**28
+_P_PRESS4 = const(10)   # |AC4| / 2**15
+_P_K = const(11)        # 50000 / 2**OSS
+_P_AC5 = const(12)      # AC5
+_P_MC_SH = const(13)    # MC << 11
+_P_B2 = const(14)       # B2
+_P_AC2 = const(15)      # AC2
+_P_AC3 = const(16)      # AC3
+_P_B1 = const(17)       # B1
+_P_AC4 = const(18)      # AC4
+_P_K_INT = const(19)    # 50000 >> OSS
+_P_OSS = const(20)      # OSS
+
+
+def _build_plan(cfa, pre, oss: int) -> tuple:
+    """Строит план компенсации для калибровочных коэффициентов cfa (AC1..MD),
+    предварительно вычисленных значений pre (_precalc(cfa)) и oversampling oss (0..3)."""
+    return (pre[0], pre[1], cfa[5], cfa[10], pre[2], pre[3], 4 * cfa[0], 2 ** oss, pre[4], pre[5], pre[6],
+            50000 / 2 ** oss,
+            cfa[4], cfa[9] << 11, cfa[7], cfa[1], cfa[2], cfa[6], cfa[3], 50000 >> oss, oss)
+
+
+@micropython.native
+def _idiv(a, b):
+    """Деление целых с отбрасыванием дробной части (к нулю), как оператор / в C (оператор // округляет вниз).
+    Работает и со скалярами, и с массивами NumPy."""
+    q = a // b
+    return q + ((q < 0) & (q * b != a))
+
+
+@micropython.native
+def _comp_temp_int(plan, ut: int) -> tuple:
+    """Целочисленный расчет температуры по алгоритму из документации (datasheet).
+    plan - план компенсации (_build_plan); ut - сырое значение температуры.
+    Возвращает (температура в 0.1 °C, B5)."""
+    x1 = ((ut - plan[_P_AC6]) * plan[_P_AC5]) >> 15
+    x2 = _idiv(plan[_P_MC_SH], x1 + plan[_P_MD])    # MC < 0: деление как в C
+    b5 = x1 + x2
+    return (b5 + 8) >> 4, b5
+
+
+@micropython.native
+def _comp_press_int_b7_b4(plan, up, b5) -> tuple:
+    """Первая часть целочисленного расчета давления: возвращает (B7, B4)."""
+    b6 = b5 - 4000
+    b6_sq = (b6 * b6) >> 12
+    x1 = (plan[_P_B2] * b6_sq) >> 11
+    x2 = (plan[_P_AC2] * b6) >> 11
+    b3 = _idiv(((plan[_P_AC1X4] + x1 + x2) << plan[_P_OSS]) + 2, 4)
+    x1 = (plan[_P_AC3] * b6) >> 13
+    x2 = (plan[_P_B1] * b6_sq) >> 16
+    x3 = (x1 + x2 + 2) >> 2
+    b4 = (plan[_P_AC4] * (x3 + 32768)) >> 15
+    # B7 в datasheet - unsigned long (32 бита)
+    return ((up - b3) * plan[_P_K_INT]) & 0xFFFF_FFFF, b4
+
+
+@micropython.native
+def _comp_press_int_tail(p):
+    """Заключительная часть целочисленного расчета давления. Возвращает давление в Па."""
+    x1 = (p >> 8) * (p >> 8)
+    x1 = (x1 * 3038) >> 16
+    x2 = (-7357 * p) >> 16
+    return p + ((x1 + x2 + 3791) >> 4)
+
+
+@micropython.native
+def _comp_press_int(plan, up: int, b5: int) -> int:
+    """Целочисленный расчет давления по алгоритму из документации (datasheet).
+    plan - план компенсации (_build_plan); up - сырое значение давления;
+    b5 - значение B5 из расчета температуры. Возвращает давление в Па."""
+    b7, b4 = _comp_press_int_b7_b4(plan, up, b5)
+    # ветвление как в datasheet, для побитового совпадения с 32-х битной реализацией (B7, B4 - unsigned long)
+    if b7 < 0x8000_0000:
+        p = (b7 << 1) // b4
+    else:
+        p = (b7 // b4) << 1
+    return _comp_press_int_tail(p)
+
+
+def _precalc(cfa) -> tuple:
+    """Предварительно вычисленные значения для вещественного расчета. precomputed values.
+    Порядок: tmp0, tmp1 (температура), press0..press4 (давление)."""
+    return (cfa[4] / 2 ** 15, cfa[9] * 2 ** 11,
+            cfa[7] / 2 ** 23, cfa[1] / 2 ** 11, cfa[2] / 2 ** 13, cfa[6] / 2 ** 28, abs(cfa[3]) / 2 ** 15)
+
+
+@micropython.native
+def _comp_temp_float(plan, ut) -> tuple:
+    """Вещественный расчет температуры. plan - план компенсации (_build_plan); ut - сырое значение температуры.
+    Возвращает (температура в °C, B5). Работает и со скалярами, и с массивами NumPy."""
+    a = plan[_P_TMP0] * (ut - plan[_P_AC6])
+    b = plan[_P_TMP1] / (a + plan[_P_MD])
+    return 6.25E-3 * (a + b + 8), a + b
+
+
+@micropython.native
+def _comp_press_float(plan, up, b5):
+    """Вещественный расчет давления в Па. plan - план компенсации (_build_plan); up - сырое значение давления;
+    b5 - значение B5 из расчета температуры. Работает и со скалярами, и с массивами NumPy."""
+    b6 = b5 - 4000
+    b6_sq = b6 ** 2
+    x3 = plan[_P_PRESS0] * b6_sq + plan[_P_PRESS1] * b6
+    b3 = (2 + ((x3 + plan[_P_AC1X4]) * plan[_P_POW_OSS])) / 4
+
+    x3 = (2 + b6 * plan[_P_PRESS2] + plan[_P_PRESS3] * b6_sq) / 4
+
+    b4 = plan[_P_PRESS4] * (x3+32768)
+    b7 = (abs(up)-b3) * plan[_P_K]
+
+    curr_pressure = 2 * b7 / b4
+    x1 = 7.073394953E-7 * curr_pressure ** 2
+    x2 = -0.1122589111328125 * curr_pressure
+
+    return curr_pressure + 6.25E-2 * (x1 + x2 + 3791)
+
+
+def compensate(cfa, raw_t, raw_p, oss: int, int_math: bool = False) -> tuple:
+    """Пакетная компенсация сырых значений UT/UP без обращения к датчику.
+    cfa - калибровочные коэффициенты AC1..MD (например, Bmp180._cfa);
+    raw_t, raw_p - последовательности сырых значений температуры и давления одинаковой длины:
+        array.array (результат - array.array) или массивы NumPy (результат - массивы NumPy, расчет
+        выполняется векторно, за один проход);
+    oss - oversampling (0..3), с которым были получены raw_p;
+    int_math - если Истина, то целочисленный алгоритм: температура в 0.1 °C, давление в Па (int).
+    Результаты совпадают с Bmp180.get_temperature()/get_pressure() для той же пары UT/UP.
+    Возвращает (температура, давление)."""
+    check_value(oss, range(4), f"Invalid oversample settings: {oss}")
+    if len(raw_t) != len(raw_p):
+        raise ValueError(f"raw_t and raw_p length mismatch: {len(raw_t)} != {len(raw_p)}")
+    if hasattr(raw_t, "dtype"):
+        cfa = [int(c) for c in cfa]
+    plan = _build_plan(cfa, _precalc(cfa), oss)
+    if hasattr(raw_t, "dtype"):
+        return _compensate_numpy(plan, raw_t, raw_p, int_math)
+    if int_math:
+        out_t, out_p = array.array("l"), array.array("l")
+        for ut, up in zip(raw_t, raw_p):
+            t, b5 = _comp_temp_int(plan, ut)
+            out_t.append(t)
+            out_p.append(_comp_press_int(plan, up, b5))
+        return out_t, out_p
+    out_t, out_p = array.array("d"), array.array("d")
+    for ut, up in zip(raw_t, raw_p):
+        t, b5 = _comp_temp_float(plan, ut)
+        out_t.append(t)
+        out_p.append(_comp_press_float(plan, up, b5))
+    return out_t, out_p
+
+
+def _compensate_numpy(plan, raw_t, raw_p, int_math: bool) -> tuple:
+    """Векторная реализация compensate() для массивов NumPy (только для хоста)."""
+    import numpy as np
+    if int_math:
+        t, b5 = _comp_temp_int(plan, np.asarray(raw_t, dtype=np.int64))
+        b7, b4 = _comp_press_int_b7_b4(plan, np.asarray(raw_p, dtype=np.int64), b5)
+        p = np.where(b7 < 0x8000_0000, (b7 << 1) // b4, (b7 // b4) << 1)
+        return t, _comp_press_int_tail(p)
+    t, b5 = _comp_temp_float(plan, np.asarray(raw_t, dtype=np.float64))
+    return t, _comp_press_float(plan, np.asarray(raw_p, dtype=np.float64), b5)
+
+
+class Bmp180(IBaseAirPresSensor, Iterator):
     """Класс для работы с датчиком давления воздуха Bosch BMP180.
     BMP180 измеряет T и P строго последовательно. Расчёт давления
     требует свежей температуры для компенсации (_B5). При включении обоих
     каналов в set_channels(True, True) итератор __next__() отдаёт приоритет
     давлению, а температуру считывает автоматически только при отсутствии
-    кэша _B5."""
+    кэша _B5 или при его устаревании (см. set_temp_refresh)."""
 
-    def __init__(self, adapter: bus_service.I2cAdapter, address: int = 0x77, oss=0b11):
+    def __init__(self, adapter: bus_service.I2cAdapter, address: int = 0x77, oss=0b11,
+                 int_math: bool = False, eoc_pin: Pin | None = None, cache_file: str | None = None):
         """i2c - объект класса I2C; oss (oversample_settings) (0..3) - точность измерения 0-грубо, но быстро,
-        3-медленно, но точно; address - адрес датчика на шине."""
+        3-медленно, но точно; address - адрес датчика на шине.
+        int_math - если Истина, то компенсация выполняется целочисленным алгоритмом из документации
+        (для MCU без FPU), иначе в вещественных числах.
+        eoc_pin - вывод MCU (Pin, вход), подключенный к выводу EOC датчика, или None. Если задан, то окончание
+        преобразования определяется по прерыванию от EOC, без опроса регистра CTRL по шине.
+        cache_file - имя файла кэша калибровки или None (кэш не используется). Для узлов с глубоким сном:
+        если кэш действителен, то вместо чтения и проверки EEPROM датчика и предварительного расчета
+        выполняется одно контрольное чтение MC, MD (4 байта). Недействительный кэш удаляется и создается заново;
+        ошибки файловой системы (OSError) не мешают работе: калибровка читается из EEPROM."""
         self._connection = DeviceEx(adapter=adapter, address=address, big_byte_order=True)
+        self._regs = RegisterMap(self._connection, _REGISTERS)
         #
         self._ch_temp = True      # канал температуры включён по умолчанию
         self._ch_press = True     # канал давления включён по умолчанию
         #
-        self._press4 = None  # for precalculate
-        self._press3 = None  # for precalculate
-        self._press2 = None  # for precalculate
-        self._press1 = None  # for precalculate
-        self._press0 = None  # for precalculate
-        self._tmp1 = None    # for precalculate
-        self._tmp0 = None    # for precalculate
+        self._pre = None     # for precalculate (см. _precalc)
+        self._plans = None   # планы компенсации по индексу OSS (см. _build_plan)
         self._B5 = None      # for precalculate
+        self._int_math = int_math  # выбор алгоритма компенсации
+        # потоковый режим (poll/__next__)
+        self._st = _ST_IDLE         # состояние конечного автомата
+        self._st_deadline = 0       # момент (ticks_ms) окончания преобразования
+        self._last_temp = None      # последнее значение температуры
+        self._last_press = None     # последнее значение давления
+        self._last_ticks = 0        # момент (ticks_ms) считывания последнего измерения
+        self._raw_t = 0             # последнее сырое значение температуры (UT)
+        self._raw_p = 0             # последнее сырое значение давления (UP)
+        self._raw_oss = 0           # OSS, с которым получено _raw_p
+        self._t_ticks = 0           # момент (ticks_ms) обновления _B5
+        self._press_count = 0       # кол-во измерений давления после обновления _B5
+        self._refresh_n = 0         # обновлять _B5 каждые N измерений давления (0 - выкл.)
+        self._refresh_ms = 0        # обновлять _B5 каждые M мс (0 - выкл.)
+        # программный режим NORMAL: запуск измерений по расписанию (см. set_power_mode)
+        self._mode = SensorMode.FORCED
+        self._normal = False        # Истина в режиме NORMAL
+        self._period_us = 0         # период измерений, мкс (0 - не задан)
+        self._next_us = 0           # момент (ticks_us) запуска следующего измерения
+        self._ring = None           # кольцевой буфер измерений (см. set_sample_ring)
+        self._timer = None          # таймер фонового режима (см. set_timer)
+        self._tick_pending = False  # шаг от таймера запланирован, но еще не выполнен
+        self._on_tick_ref = self._on_tick  # ссылка создается заранее, в прерывании выделять память нельзя
+        self.reset_normal_stats()
+        # вывод EOC (End Of Conversion)
+        self._eoc_pin = eoc_pin
+        self._eoc_flag = False      # устанавливается обработчиком прерывания
+        self._eoc_callback = None   # функция пользователя, вызываемая через micropython.schedule
+        self._on_eoc_ref = self._on_eoc  # ссылка создается заранее, в прерывании выделять память нельзя
+        if eoc_pin is not None:
+            eoc_pin.irq(trigger=Pin.IRQ_RISING, handler=self._eoc_irq)
         #
         self._oversample_press = None
+        self._oss_shift = None      # 8 - OSS, для _get_press_raw
         self.set_oversampling(temp=0, press=oss)
         # массив, хранящий калибровочные коэффициенты (11 штук)
         self._cfa = array.array("l")  # signed long elements
-        # считываю калибровочные коэффициенты
-        self._read_calibration_data()
-        # предварительный расчет
-        self._precalculate()
+        if cache_file is None or not self._load_calibration_cache(cache_file):
+            # считываю калибровочные коэффициенты
+            self._read_calibration_data()
+            # предварительный расчет
+            self._precalculate()
+            if cache_file is not None:
+                self._save_calibration_cache(cache_file)
+        # планы компенсации для всех OSS, переключение OSS не требует вычислений
+        self._plans = tuple(_build_plan(self._cfa, self._pre, oss) for oss in range(4))
 
     @staticmethod
     def _check_cc(index: int):
@@ -79,16 +344,7 @@ class Bmp180(IBaseAirPresSensor):
     @micropython.native
     def _precalculate(self):
         """предварительно вычисленные значения. precomputed values"""
-        # для расчета температуры/for temperature calculation
-        get_cc = self.get_calibration
-        self._tmp0 = get_cc(4) / 2 ** 15  #
-        self._tmp1 = get_cc(9) * 2 ** 11  #
-        # для расчета давления/for pressure calculation
-        self._press0 = get_cc(7) / 2 ** 23
-        self._press1 = get_cc(1) / 2 ** 11
-        self._press2 = get_cc(2) / 2 ** 13
-        self._press3 = get_cc(6) / 2 ** 28
-        self._press4 = abs(get_cc(3)) / 2 ** 15
+        self._pre = _precalc(self._cfa)
 
     @staticmethod
     @micropython.native
@@ -123,13 +379,12 @@ class Bmp180(IBaseAirPresSensor):
 
     def _read_calibration_data(self) -> int:
         """Читает калибровочные значение из датчика.
+        Весь блок 0xAA..0xBF (22 байта) считывается за одну транзакцию на шине
+        и распаковывается одним предкомпилированным форматом (RegisterMap.read_block).
         read calibration values from sensor. return count read values"""
         if len(self._cfa):
             raise ValueError(f"calibration data array already filled!")
-        conn = self._connection
-        for index, addr in enumerate(_calibration_regs_addr()):
-            reg_val = conn.read_reg(addr, 2)
-            rv = conn.unpack("H" if 2 < index < 6 else "h", reg_val)[0]
+        for index, rv in enumerate(self._regs.read_block("AC1", "MD")):
             # check
             is_ok, msg = Bmp180._validate_cc(index, rv)
             if not is_ok:
@@ -137,18 +392,61 @@ class Bmp180(IBaseAirPresSensor):
             self._cfa.append(rv)
         return len(self._cfa)
 
+    def _save_calibration_cache(self, file_name: str) -> bool:
+        """Сохраняет калибровочные коэффициенты и предварительно вычисленные значения в файл.
+        Ключ кэша - адрес датчика на шине и chip_id. Возвращает Истина при успехе; при ошибке файловой
+        системы недописанный файл удаляется."""
+        payload = struct.pack(_CACHE_FMT, _CACHE_MAGIC, _CACHE_VERSION, self._connection.address,
+                              self.get_id().chip_id, *(tuple(self._cfa) + tuple(self._pre)))
+        try:
+            with open(file_name, "wb") as f:
+                f.write(payload)
+                f.write(struct.pack(_CACHE_CRC_FMT, _fletcher16(payload)))
+        except OSError:
+            _remove_file(file_name)
+            return False
+        return True
+
+    def _load_calibration_cache(self, file_name: str) -> bool:
+        """Загружает калибровку из файла кэша. Возвращает Истина при успехе.
+        Кэш считается недействительным и удаляется, если не совпадают сигнатура, версия, контрольная сумма,
+        адрес или контрольное чтение коэффициентов MC, MD из датчика (одна транзакция).
+        chip_id при загрузке не считывается: у всех BMP180 он равен 0x55 и датчики не различает."""
+        payload_size = struct.calcsize(_CACHE_FMT)
+        try:
+            with open(file_name, "rb") as f:
+                raw = f.read()
+        except OSError:
+            return False    # кэша еще нет или файловая система недоступна
+        valid = False
+        if payload_size + struct.calcsize(_CACHE_CRC_FMT) == len(raw):
+            payload = raw[:payload_size]
+            crc = struct.unpack(_CACHE_CRC_FMT, raw[payload_size:])[0]
+            values = struct.unpack(_CACHE_FMT, payload)
+            magic, version, address = values[:3]
+            cfa, pre = values[4:15], values[15:]
+            valid = (crc == _fletcher16(payload) and _CACHE_MAGIC == magic and _CACHE_VERSION == version
+                     and self._connection.address == address)
+            if valid:
+                # дешевая проверка: последние два коэффициента (MC, MD) считываются из датчика за одну транзакцию
+                valid = tuple(self._regs.read_block("MC", "MD")) == cfa[9:]
+        if not valid:
+            _remove_file(file_name)
+            return False
+        for val in cfa:
+            self._cfa.append(val)
+        self._pre = pre
+        return True
+
     def get_id(self) -> SensorID:
         """Возвращает идентификатор датчика. Правильное значение - 0х55.
         Returns the ID of the sensor. The correct value is 0x55."""
-        conn = self._connection
-        res = conn.read_reg(_REG_ID, 1)
-        return SensorID(int(res[0]), None, None, None)
+        return SensorID(self._regs.read(_ID), None, None, None)
 
     def soft_reset(self):
         """программный сброс датчика.
         software reset of the sensor"""
-        conn = self._connection
-        conn.write_reg(_REG_SOFT_RESET, 0xB6, 1)
+        self._regs.write(_SOFT_RESET, 0xB6)
 
     @micropython.native
     def start_measurement(self):
@@ -164,43 +462,52 @@ class Bmp180(IBaseAirPresSensor):
         measure_temp = False if self._ch_press else self._ch_temp
         if not self._ch_press and not self._ch_temp:
             return  # оба канала выключены
+        self._start(measure_temp)
 
-        loc_oss = self.set_oversampling(None, None).pressure
+    @micropython.native
+    def _start(self, measure_temp: bool):
+        """Запускает измерение температуры (measure_temp Истина) или давления (Ложь)."""
+        loc_oss = self._oversample_press
         start_conversion = 0b0010_0000   # bit 5 - запуск преобразования (1)
         bit_4_0 = _PRESSURE_MEAS  # измеряю давление
         if measure_temp:
             bit_4_0 = _TEMPERATURE_MEAS  # измеряю температуру
             loc_oss = 0  # обнуляю OSS при измерении температуры
-        val = loc_oss << 6 | start_conversion | bit_4_0
-        self._connection.write_reg(_REG_CTRL, val, 1)
+        # флаг EOC сбрасывается до записи: прерывание по окончанию этого преобразования установит его снова
+        self._eoc_flag = False
+        self._st_deadline = time.ticks_add(time.ticks_ms(), _CONV_TIME_PRESS[loc_oss])
+        self._regs.write(_CTRL, loc_oss << 6 | start_conversion | bit_4_0)
         # Сброс кэша температуры. Чтобы данные давления были поточнее!
         # self._B5 = None
 
     def _get_temp_raw(self) -> int:
         """Возвращает сырое значение температуры."""
-        # считывание сырого значения
-        conn = self._connection
-        raw = conn.read_reg(_REG_OUT_MSB, 2)
-        return conn.unpack("H", raw)[0]  # unsigned short
+        # считывание сырого значения в заранее выделенный буфер карты регистров
+        self._raw_t = ut = self._regs.read(_OUT_T)  # unsigned short
+        return ut
 
     @micropython.native
     def get_temperature(self) -> float:
         """возвращает значение температуры, измеренное датчиком в Цельсиях.
         returns the temperature value measured by the sensor in Celsius"""
-        get_cc = self.get_calibration
-        raw_t = self._get_temp_raw()
-        a = self._tmp0 * (raw_t - get_cc(5))
-        b = self._tmp1 / (a + get_cc(10))
-        self._B5 = a + b  #
-        return 6.25E-3 * (a + b + 8)
+        if self._int_math:
+            return 0.1 * self.get_temperature_int()
+        t, self._B5 = _comp_temp_float(self._plans[0], self._get_temp_raw())
+        return t
 
     def _get_press_raw(self) -> int:
         """Возвращает сырое значение атмосферного давления."""
-        # считывание сырого значения (три байта)
-        raw = self._connection.read_reg(_REG_OUT_MSB, 3)
-        msb, lsb, xlsb = raw
-        oss = self.set_oversampling(None, None).pressure
-        return ((msb << 16) + (lsb << 8) + xlsb) >> (8 - oss)
+        # считывание сырого значения (три байта) в заранее выделенный буфер карты регистров
+        self._raw_p = up = self._regs.read(_OUT_P) >> self._oss_shift
+        self._raw_oss = self._oversample_press
+        return up
+
+    def get_raw(self) -> tuple:
+        """Возвращает последние считанные сырые значения (UT, UP, OSS) для записи в журнал (см. bmp180_log).
+        OSS - тот, с которым получено и компенсируется UP (он может меняться между измерениями,
+        например, bmp180_adaptive.AdaptiveOss).
+        returns the last raw (UT, UP, OSS) values"""
+        return self._raw_t, self._raw_p, self._raw_oss
 
     @micropython.native
     def get_pressure(self) -> float:
@@ -209,29 +516,35 @@ class Bmp180(IBaseAirPresSensor):
         Лучше вызывайте метод парами:
         get_temperature
         get_pressure"""
+        if self._int_math:
+            return float(self.get_pressure_int())
         if self._B5 is None:
             raise RuntimeError("Call get_temperature() before get_pressure()")
         #
-        uncompensated = self._get_press_raw()
-        b6 = self._B5-4000
-        x1 = self._press0 * b6 ** 2  #
-        x2 = self._press1 * b6
-        x3 = x1 + x2
-        oss = self.set_oversampling(None, None).pressure
-        b3 = (2 + ((x3 + 4 * self.get_calibration(0)) * 2**oss)) / 4
-
-        x1 = b6 * self._press2
-        x2 = self._press3 * b6 ** 2
-        x3 = (2+x1+x2) / 4
-
-        b4 = self._press4 * (x3+32768)
-        b7 = (abs(uncompensated)-b3) * (50000 / 2**oss)
-
-        curr_pressure = 2 * b7 / b4
-        x1 = 7.073394953E-7 * curr_pressure ** 2
-        x2 = -0.1122589111328125 * curr_pressure
-
-        return curr_pressure + 6.25E-2 * (x1 + x2 + 3791)
+        return _comp_press_float(self._plans[self._oversample_press], self._get_press_raw(), self._B5)
+
+    def get_temperature_int(self) -> int:
+        """Возвращает температуру в десятых долях градуса Цельсия (0.1 °C).
+        Целочисленный алгоритм из документации, без вещественной арифметики.
+        returns the temperature in 0.1 °C, integer-only datasheet algorithm"""
+        t, self._B5 = _comp_temp_int(self._plans[0], self._get_temp_raw())
+        return t
+
+    def get_pressure_int(self) -> int:
+        """Возвращает давление в Па (int). Целочисленный алгоритм из документации.
+        До вызова этого метода нужно вызвать хотя-бы один раз метод get_temperature(_int).
+        returns the pressure in Pa, integer-only datasheet algorithm"""
+        if self._B5 is None:
+            raise RuntimeError("Call get_temperature() before get_pressure()")
+        return _comp_press_int(self._plans[self._oversample_press], self._get_press_raw(), int(self._B5))
+
+    def set_int_math(self, value: bool | None = None) -> None | bool:
+        """Выбор алгоритма компенсации: Истина - целочисленный (datasheet), Ложь - вещественный.
+        Если value в None, то возвращает текущий выбор."""
+        if value is None:
+            return self._int_math
+        self._int_math = value
+        return None
 
 
     def set_channels(self, temp_en, press_en) -> None | MeasChannels:
@@ -256,12 +569,249 @@ class Bmp180(IBaseAirPresSensor):
         #
         return None
 
+    def set_temp_refresh(self, every_n: int | None = None, every_ms: int | None = None) -> None | tuple:
+        """Политика устаревания кэша температуры (_B5) для потокового режима (poll/__next__).
+        every_n - обновлять температуру каждые every_n измерений давления;
+        every_ms - обновлять температуру, если с последнего обновления прошло every_ms мс.
+        0 - критерий выключен. Температура всегда измеряется при отсутствии кэша _B5.
+        Если оба параметра None, возвращает (every_n, every_ms)."""
+        if every_n is None and every_ms is None:
+            return self._refresh_n, self._refresh_ms
+        if every_n is not None:
+            self._refresh_n = check_value(every_n, range(0x10000), f"Invalid every_n value: {every_n}")
+        if every_ms is not None:
+            self._refresh_ms = check_value(every_ms, range(0x100_0000), f"Invalid every_ms value: {every_ms}")
+        return None
+
+    def _is_temp_stale(self) -> bool:
+        """Возвращает Истина, если кэш температуры (_B5) пуст или устарел."""
+        if self._B5 is None:
+            return True
+        if self._refresh_n and self._press_count >= self._refresh_n:
+            return True
+        return 0 != self._refresh_ms and time.ticks_diff(time.ticks_ms(), self._t_ticks) >= self._refresh_ms
+
+    def _eoc_irq(self, pin):
+        """Обработчик прерывания от вывода EOC: преобразование завершено."""
+        self._eoc_flag = True
+        if self._eoc_callback is not None:
+            micropython.schedule(self._on_eoc_ref, 0)
+
+    def _on_eoc(self, _):
+        """Вызывается через micropython.schedule после прерывания от вывода EOC. Считывает результат
+        и передает его функции, заданной set_eoc_callback."""
+        callback = self._eoc_callback
+        if callback is None or _ST_IDLE == self._st:
+            return
+        res = self.poll()
+        if res is not None:
+            callback(res)
+
+    def set_eoc_callback(self, callback=None):
+        """Устанавливает функцию callback(TimedParams), вызываемую (через micropython.schedule) при
+        готовности очередного измерения, по прерыванию от вывода EOC. None - отключить.
+        Для непрерывных измерений вызывайте poll() в callback, чтобы запустить следующее преобразование.
+        Требует eoc_pin в конструкторе."""
+        if callback is not None and self._eoc_pin is None:
+            raise ValueError("eoc_pin is not set")
+        self._eoc_callback = callback
+
+    def _is_ready(self) -> bool:
+        """Возвращает Истина, если запущенное преобразование завершено.
+        С выводом EOC - по флагу прерывания (без обращения к шине), иначе по времени и биту SCO."""
+        if self._eoc_pin is not None:
+            return self._eoc_flag
+        return not self.remaining_ms() and self.get_data_status(raw=False)
+
+    def _idle_wait(self):
+        """Пауза блокирующего ожидания окончания преобразования."""
+        if self._normal and _ST_IDLE == self._st:
+            # ожидание момента запуска следующего измерения по расписанию
+            time.sleep_us(max(1, time.ticks_diff(self._next_us, time.ticks_us())))
+        elif self._eoc_pin is not None:
+            time.sleep_us(_EOC_WAIT_US)
+        else:
+            time.sleep_ms(self.remaining_ms() or 1)
+
+    def _begin(self, measure_temp: bool):
+        """Запускает преобразование и переводит конечный автомат в состояние ожидания его результата."""
+        self._start(measure_temp)
+        self._st = _ST_TEMP if measure_temp else _ST_PRESS
+
+    def remaining_ms(self) -> int:
+        """Возвращает время в мс до окончания текущего преобразования (0, если оно должно быть завершено).
+        С выводом EOC возвращает 0 сразу после прерывания."""
+        if self._eoc_flag:
+            return 0
+        return max(0, time.ticks_diff(self._st_deadline, time.ticks_ms()))
+
+    def _step(self) -> bool:
+        """Шаг конечного автомата потокового режима. Возвращает Истина, когда готово очередное
+        измерение: значения в _last_temp, _last_press, _last_ticks."""
+        st = self._st
+        if _ST_IDLE == st:
+            if (self._ch_temp or self._ch_press) and (not self._normal or self._release()):
+                self._begin(not self._ch_press or self._is_temp_stale())
+            return False
+        if not self._is_ready():
+            return False    # преобразование еще не завершено
+        now = time.ticks_ms()
+        self._last_ticks = now
+        if _ST_TEMP == st:
+            self._last_temp = self.get_temperature()
+            self._t_ticks = now
+            self._press_count = 0
+            if self._ch_press:
+                self._begin(False)  # давление сразу после свежей температуры
+                return False
+            self._st = _ST_IDLE
+            self._last_press = None
+            return self._done()
+        # _ST_PRESS
+        self._st = _ST_IDLE
+        self._last_press = self.get_pressure()
+        self._press_count += 1
+        return self._done()
+
+    def _release(self) -> bool:
+        """Режим NORMAL: возвращает Истина, если наступил момент запуска очередного измерения,
+        и назначает следующий. Следующий момент отсчитывается от предыдущего, а не от текущего времени,
+        поэтому длительность обработки измерений не накапливается (без дрейфа). Целиком пропущенные
+        периоды учитываются как переполнения (overruns) и не выполняются пачкой."""
+        late = time.ticks_diff(time.ticks_us(), self._next_us)
+        if late < 0:
+            return False
+        period = self._period_us
+        if late >= period:
+            missed = late // period
+            self._overruns += missed
+            late -= missed * period
+            self._next_us = time.ticks_add(self._next_us, missed * period)
+        self._next_us = time.ticks_add(self._next_us, period)
+        self._jitter_sum += late
+        if late > self._jitter_max:
+            self._jitter_max = late
+        self._released += 1
+        return True
+
+    def _done(self) -> bool:
+        """Завершение измерения конечным автоматом. В режиме NORMAL измерение учитывается в статистике
+        и записывается в кольцевой буфер (если задан)."""
+        if self._normal:
+            self._samples += 1
+            ring = self._ring
+            if ring is not None:
+                ring.append(self._last_ticks, self._last_temp if self._ch_temp else None, self._last_press)
+        return True
+
+    def _wait_ready(self):
+        """Блокирующее ожидание окончания преобразования, запущенного _begin."""
+        while not self._is_ready():
+            self._idle_wait()
+
+    def burst(self, count: int, oss: int | None = None) -> BurstResult:
+        """Пакетное измерение: одно измерение температуры (одно значение _B5) и count измерений
+        давления подряд с oversampling oss (None - текущий). Сырые значения UP усредняются в целых числах,
+        компенсация выполняется один раз. Программное усреднение дополняет аппаратное (OSS 0..3).
+        Возвращает BurstResult:
+            pressure, temperature - результат, Па и °C;
+            count, oss - параметры пакета;
+            raw_mean, raw_std - среднее и СКО сырых значений UP, ед. АЦП;
+            noise_pa - СКО одного измерения давления, Па;
+            resolution_pa - СКО среднего (noise_pa / sqrt(count)), то есть эффективное разрешение, Па;
+            elapsed_us - время пакета (шина и ожидание преобразований), мкс;
+            pa_sqrt_ms - resolution_pa * sqrt(elapsed_us / 1000), Па*мс^0.5. Не зависит от count
+                и позволяет сравнивать OSS по разрешению на миллисекунду времени (меньше - лучше)."""
+        check_value(count, range(1, 0x1_0000), f"Invalid count value: {count}")
+        if _ST_IDLE != self._st:
+            raise RuntimeError("Conversion in progress")
+        prev_oss = self._oversample_press
+        if oss is not None:
+            self.set_oversampling(press=oss)
+        loc_oss = self._oversample_press
+        started = time.ticks_us()
+        try:
+            self._begin(True)
+            self._wait_ready()
+            self._last_temp = self.get_temperature()
+            self._t_ticks = time.ticks_ms()
+            total, total_sq = 0, 0
+            for _ in range(count):
+                self._begin(False)
+                self._wait_ready()
+                up = self._get_press_raw()
+                total += up
+                total_sq += up * up
+        finally:
+            self._st = _ST_IDLE
+            self.set_oversampling(press=prev_oss)
+        elapsed = time.ticks_diff(time.ticks_us(), started)
+        b5, plan = self._B5, self._plans[loc_oss]
+        if self._int_math:
+            press = float(_comp_press_int(plan, (2 * total + count) // (2 * count), int(b5)))
+        else:
+            press = _comp_press_float(plan, total / count, b5)
+        self._last_press = press
+        raw_mean = total / count
+        raw_std = math.sqrt((count * total_sq - total * total) / (count * (count - 1))) if count > 1 else 0.0
+        # чувствительность давления к изменению UP на единицу, Па/ед. АЦП
+        sens = abs(_comp_press_float(plan, raw_mean + 1, b5) - _comp_press_float(plan, raw_mean, b5))
+        noise = raw_std * sens
+        resolution = noise / math.sqrt(count)
+        return BurstResult(pressure=press, temperature=self._last_temp, count=count, oss=loc_oss,
+                           raw_mean=raw_mean, raw_std=raw_std, noise_pa=noise, resolution_pa=resolution,
+                           elapsed_us=elapsed, pa_sqrt_ms=resolution * math.sqrt(0.001 * elapsed))
+
+    def poll(self) -> TimedParams | None:
+        """Неблокирующий шаг потокового режима. Запускает преобразования, выбирает T или P
+        по set_channels и политике set_temp_refresh, считывает результаты.
+        Возвращает TimedParams(temperature, pressure, timestamp), когда готово очередное
+        измерение, иначе None. timestamp - значение time.ticks_ms() момента считывания.
+        Значение выключенного канала равно None."""
+        if not self._step():
+            return None
+        temp = self._last_temp if self._ch_temp else None
+        return TimedParams(temperature=temp, pressure=self._last_press, timestamp=self._last_ticks)
+
+    def poll_into(self, ring) -> bool:
+        """То же, что poll, но измерение записывается в кольцевой буфер ring
+        (sensor_pack_2.ring_buffer.SampleRing), без создания TimedParams.
+        Возвращает Истина, если в буфер добавлено измерение."""
+        if not self._step():
+            return False
+        if not self._normal or ring is not self._ring:     # в режиме NORMAL буфер set_sample_ring заполняет _done
+            ring.append(self._last_ticks, self._last_temp if self._ch_temp else None, self._last_press)
+        return True
+
+    def __next__(self) -> TimedParams:
+        """Блокирующее получение очередного измерения (см. poll)."""
+        if not self._ch_temp and not self._ch_press:
+            raise StopIteration     # оба канала выключены
+        while True:
+            res = self.poll()
+            if res is not None:
+                return res
+            self._idle_wait()
+
+    def measurements(self, count: int | None = None):
+        """Генератор измерений TimedParams. count - кол-во измерений или None (бесконечно).
+        Завершается, если оба канала выключены."""
+        while count is None or count > 0:
+            try:
+                mp = next(self)
+            except StopIteration:   # внутри генератора StopIteration превратился бы в RuntimeError
+                return
+            yield mp
+            if count is not None:
+                count -= 1
+
     def set_oversampling(self, temp: int | None = None, press: int | None = None) -> None | OversamplingCoeff:
         """Устанавливает коэффициент избыточной (oversampling ratio) выборки измерения давления (0: однократный, 1: 2 раза, 2: 4 раза, 3: 8 раз)."""
         if press is None and temp is None:
             return OversamplingCoeff(temperature=0, pressure=self._oversample_press)
         if press is not None:
             self._oversample_press = check_value(press, range(4), f"Invalid oversample settings: {press}")
+            self._oss_shift = 8 - press
         # Запись OSS в регистр происходит только при start_measurement()
         return None
 
@@ -269,10 +819,16 @@ class Bmp180(IBaseAirPresSensor):
         """Возвращает время в мс преобразования сигнала в цифровой код и готовности его для чтения по шине!
         Для текущих настроек датчика. При изменении настроек следует заново вызвать этот метод!"""
         cct = _CONV_TIME_PRESS
-        _os_p = self.set_oversampling(None,None).pressure
+        _os_p = self._oversample_press
         # Если включено давление, то время преобразования зависит от OSS, иначе фиксировано для T
         return cct[_os_p] if self._ch_press else cct[0]
 
+    @staticmethod
+    def get_press_conversion_time(oss: int) -> int:
+        """Возвращает время в мс преобразования давления для oversampling oss (0..3).
+        Время преобразования температуры равно get_press_conversion_time(0)."""
+        return _CONV_TIME_PRESS[check_value(oss, range(4), f"Invalid oversample settings: {oss}")]
+
     def get_measurement_value(self, value_index: int) -> float:
         """Возвращает измеренное датчиком значение(значения) по его индексу/номеру.
         0 - температура воздуха;
@@ -286,12 +842,12 @@ class Bmp180(IBaseAirPresSensor):
     def is_single_shot_mode(self) -> bool:
         """Возвращает Истина, когда датчик находится в режиме однократных измерений,
         каждое из которых запускается методом start_measurement"""
-        return True
+        return not self._normal
 
     def is_continuously_mode(self) -> bool:
         """Возвращает Истина, когда датчик находится в режиме многократных измерений,
-        производимых автоматически. Процесс запускается методом start_measurement"""
-        return False
+        производимых автоматически (программный режим NORMAL, см. set_power_mode)"""
+        return self._normal
 
     def get_data_status(self, raw: bool = True):
         """Возвращает состояние готовности данных для считывания?
@@ -300,8 +856,12 @@ class Bmp180(IBaseAirPresSensor):
         Для определения готовности данных температуры или давления у датчика BMP180 нужно читать
         бит SCO (Start of Conversion) в регистре управления измерениями _REG_CTRL.
         Пока бит SCO равен 1 — преобразование в процессе.
-        Когда SCO в 0 — преобразование завершено, данные готовы для чтения из регистров результата."""
-        raw_val = self._connection.read_reg(_REG_CTRL, 1)[0]
+        Когда SCO в 0 — преобразование завершено, данные готовы для чтения из регистров результата.
+        С выводом EOC (eoc_pin) при raw Ложь готовность определяется по флагу прерывания, без обращения к шине;
+        сырое значение регистра (raw Истина) всегда считывается по шине."""
+        if not raw and self._eoc_pin is not None:
+            return self._eoc_flag
+        raw_val = self._regs.read(_CTRL)
         if raw:
             return raw_val
         return 0 == (raw_val & _MSK_BIT_SCO)
@@ -327,8 +887,9 @@ class Bmp180(IBaseAirPresSensor):
             while not sensor.get_data_status(raw=False): pass  # ждём SCO=0
             sensor.refresh_config()
         """
-        reg = self._connection.read_reg(_REG_CTRL, 1)[0]
+        reg = self._regs.read(_CTRL)
         self._oversample_press = (reg >> 6) & 0x03
+        self._oss_shift = 8 - self._oversample_press
 
         # Аппаратный регистр хранит только тип СЛЕДУЮЩЕГО измерения.
         # Синхронизирую программные флаги с состоянием чипа:
@@ -336,28 +897,96 @@ class Bmp180(IBaseAirPresSensor):
         self._ch_press = is_pressure_next
         self._ch_temp = not is_pressure_next
 
-    def set_power_mode(self, value: int | None = None) -> int:
-        """BMP180 не поддерживает аппаратные режимы (Sleep/Normal).
-        Датчик всегда находится в состоянии готовности к Forced-измерению.
-        Метод игнорирует запись и всегда возвращает 1 (Forced).
+    def set_power_mode(self, value: int | None = None) -> None | int:
+        """BMP180 не поддерживает аппаратные режимы (Sleep/Normal): каждое измерение запускается хостом.
+        Режим NORMAL реализован программно: poll, poll_into, __next__ (и таймер, см. set_timer) запускают
+        измерения по расписанию с периодом set_sampling_period, без дрейфа. Измерения записываются в
+        кольцевой буфер set_sample_ring, статистика - get_normal_stats.
+        SLEEP и FORCED выключают режим NORMAL: измерения запускаются вызовами poll/start_measurement
+        без расписания (в промежутках датчик простаивает, что и есть его режим сна).
 
         Args:
-            value: Игнорируется.
-        Returns:
-            int: 1 (всегда Forced).
+            value: SensorMode.SLEEP, SensorMode.FORCED или SensorMode.NORMAL. None - вернуть текущий режим.
+        Raises:
+            ValueError: неверный режим или режим NORMAL при не заданном периоде измерений.
         """
-        return SensorMode.FORCED
+        if value is None:
+            return self._mode
+        check_value(value, (SensorMode.SLEEP, SensorMode.FORCED, SensorMode.NORMAL),
+                    f"Invalid power mode value: {value}")
+        normal = SensorMode.NORMAL == value
+        if normal and not self._period_us:
+            raise ValueError("Sampling period is not set")
+        if normal and not self._normal:
+            self._next_us = time.ticks_us()     # первое измерение - сразу
+            self.reset_normal_stats()
+        self._mode = value
+        self._normal = normal
+        return None
 
-    def set_sampling_period(self, period: int | None = None) -> int:
-        """BMP180 не имеет регистра ODR. Частота измерений управляется программно хостом.
-        Возвращает 0, чтобы обозначить отсутствие аппаратной настройки периода.
+    def set_sampling_period(self, period: int | None = None) -> None | int:
+        """BMP180 не имеет регистра ODR. Период (мс) измерений программного режима NORMAL (см. set_power_mode).
+        Период должен быть не меньше длительности измерения (get_conversion_cycle_time и, при обновлении
+        температуры, еще get_press_conversion_time(0)), иначе измерения запаздывают (см. get_normal_stats).
+        Если period в None, возвращает текущий период в мс (0 - не задан)."""
+        if period is None:
+            return self._period_us // 1000
+        self._period_us = 1000 * check_value(period, range(1, 0x8_0000), f"Invalid sampling period: {period}")
+        if self._normal:
+            self._next_us = time.ticks_us()
+        return None
 
-        Args:
-            period: Игнорируется.
-        Returns:
-            int: 0.
-        """
-        return 0
+    def set_sample_ring(self, ring=None):
+        """Устанавливает кольцевой буфер ring (sensor_pack_2.ring_buffer.SampleRing), в который в режиме NORMAL
+        записываются все измерения (poll, poll_into, __next__, таймер). None - не записывать."""
+        self._ring = ring
+
+    def set_timer(self, timer=None, tick_ms: int = 1):
+        """Фоновый режим NORMAL: таймер timer (machine.Timer) каждые tick_ms мс планирует
+        (micropython.schedule) шаг конечного автомата. Измерения выполняются по расписанию без участия
+        программы и записываются в буфер set_sample_ring. Пока таймер подключен, не вызывайте poll/__next__.
+        None - отключить таймер (он освобождается методом deinit)."""
+        if self._timer is not None:
+            self._timer.deinit()
+        self._timer = timer
+        self._tick_pending = False
+        if timer is not None:
+            timer.init(mode=timer.PERIODIC, period=tick_ms, callback=self._timer_irq)
+
+    def _timer_irq(self, timer):
+        """Обработчик прерывания таймера. Шаг выполняется вне прерывания, через micropython.schedule."""
+        if self._normal and not self._tick_pending:
+            self._tick_pending = True
+            micropython.schedule(self._on_tick_ref, 0)
+
+    def _on_tick(self, _):
+        self._tick_pending = False
+        if self._normal:
+            self._step()
+
+    def reset_normal_stats(self):
+        """Обнуляет статистику режима NORMAL."""
+        self._samples = 0           # кол-во завершенных измерений
+        self._released = 0          # кол-во запусков по расписанию
+        self._overruns = 0          # кол-во целиком пропущенных периодов
+        self._jitter_sum = 0        # сумма запаздываний запуска относительно расписания, мкс
+        self._jitter_max = 0        # наибольшее запаздывание запуска, мкс
+        self._stats_ticks = time.ticks_ms()
+
+    def get_normal_stats(self) -> NormalStats:
+        """Статистика режима NORMAL с момента его включения (или reset_normal_stats):
+            samples - кол-во измерений;
+            rate_hz - достигнутая частота измерений, Гц;
+            jitter_us, max_jitter_us - среднее и наибольшее запаздывание запуска измерения относительно
+                расписания, мкс;
+            overruns - кол-во пропущенных периодов (измерение или его обработка не уложились в период)."""
+        elapsed = time.ticks_diff(time.ticks_ms(), self._stats_ticks)
+        released = self._released
+        return NormalStats(samples=self._samples,
+                           rate_hz=1000 * self._samples / elapsed if elapsed > 0 else 0.0,
+                           jitter_us=self._jitter_sum / released if released else 0.0,
+                           max_jitter_us=self._jitter_max, overruns=self._overruns)
 
     def is_data_ready(self) -> bool:
+        """Истина, если запущенное преобразование завершено. С выводом EOC - без обращения к шине."""
         return self.get_data_status(raw=False)
\ No newline at end of file
@@ -0,0 +1,132 @@
+# micropython
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Адаптивный выбор oversampling (OSS) датчика Bmp180 во время работы.
+При быстром изменении давления (подъем/спуск) выбирается OSS=0 (минимальная задержка),
+при неподвижном сигнале OSS повышается до допустимого заданной частотой измерений
+или достаточного для заданного уровня шума."""
+import array
+import time
+
+from bmp180 import Bmp180
+
+# типичный шум (СКО) давления одного измерения в Па по индексу OSS (документация BMP180)
+NOISE_PA = (6.0, 5.0, 4.0, 3.0)
+
+
+class AdaptiveOss:
+    """Контроллер oversampling.
+    Example:
+        >>> ctrl = AdaptiveOss(sensor, target_rate_hz=20)
+        >>> for mp in sensor:
+        ...     ctrl.update(mp.pressure)
+    """
+
+    def __init__(self, sensor: Bmp180, target_rate_hz: float | None = None, noise_floor_pa: float | None = None,
+                 window: int = 8, threshold: float = 4.0, hold: int = 8):
+        """sensor - датчик;
+        target_rate_hz - требуемая частота измерений давления, Гц. Ограничивает OSS сверху. None - без ограничения;
+        noise_floor_pa - достаточный уровень шума, Па. OSS не поднимается выше необходимого для него. None - 3;
+        window - кол-во измерений, по которым оценивается дисперсия давления;
+        threshold - порог отношения наблюдаемой дисперсии к ожидаемой дисперсии шума текущего OSS,
+            выше которого сигнал считается быстро меняющимся;
+        hold - кол-во подряд 'неподвижных' окон до повышения OSS на одну ступень."""
+        if window < 2:
+            raise ValueError(f"Invalid window value: {window}")
+        self._sensor = sensor
+        self._threshold = threshold
+        self._hold = hold
+        self._top = self._calc_top(target_rate_hz, noise_floor_pa)
+        # окно значений давления относительно _ref (для точности вещественных чисел одинарной точности)
+        self._win = array.array("f", (0 for _ in range(window)))
+        self._ref = None
+        self._pos = 0
+        self._count = 0
+        self._quiet = 0     # кол-во подряд 'неподвижных' окон
+        # метрики по индексу OSS
+        self._time_ms = array.array("L", (0, 0, 0, 0))
+        self._samples = array.array("L", (0, 0, 0, 0))
+        self._switches = 0
+        self._last_ticks = None
+        self._oss = sensor.set_oversampling(None, None).pressure
+
+    @staticmethod
+    def _calc_top(target_rate_hz: float | None, noise_floor_pa: float | None) -> int:
+        """Возвращает максимальный OSS, допустимый по частоте измерений и достаточный по шуму."""
+        top = 3
+        if noise_floor_pa is not None:
+            while top and NOISE_PA[top - 1] <= noise_floor_pa:
+                top -= 1
+        if target_rate_hz is not None:
+            period = 1000 / target_rate_hz
+            while top and Bmp180.get_press_conversion_time(top) > period:
+                top -= 1
+        return top
+
+    @property
+    def oss(self) -> int:
+        """Текущий OSS"""
+        return self._oss
+
+    def _set_oss(self, value: int):
+        if value == self._oss:
+            return
+        self._sensor.set_oversampling(press=value)
+        self._oss = value
+        self._switches += 1
+        self._reset_window()
+
+    def _reset_window(self):
+        self._ref = None
+        self._pos = self._count = 0
+
+    def update(self, pressure: float, timestamp: int | None = None) -> int:
+        """Принимает очередное значение давления (Па) и метку времени (time.ticks_ms(), None - текущее время).
+        Возвращает OSS, установленный в датчике для следующих измерений."""
+        if timestamp is None:
+            timestamp = time.ticks_ms()
+        oss = self._oss
+        if self._last_ticks is not None:
+            self._time_ms[oss] += time.ticks_diff(timestamp, self._last_ticks)
+        self._last_ticks = timestamp
+        self._samples[oss] += 1
+        #
+        if self._ref is None:
+            self._ref = pressure
+        win = self._win
+        size = len(win)
+        win[self._pos] = pressure - self._ref
+        self._pos = (self._pos + 1) % size
+        if self._count < size:
+            self._count += 1
+        if self._count < size:
+            return oss     # окно еще не заполнено
+        # несмещенная оценка дисперсии по окну
+        mean = sum(win) / size
+        var = sum((v - mean) * (v - mean) for v in win) / (size - 1)
+        noise = NOISE_PA[oss]
+        if var > self._threshold * noise * noise:
+            # быстрое изменение давления: минимальная задержка
+            self._quiet = 0
+            self._set_oss(0)
+        elif oss < self._top:
+            self._quiet += 1
+            if self._quiet >= self._hold:
+                self._quiet = 0
+                self._set_oss(oss + 1)
+        elif oss > self._top:
+            self._set_oss(self._top)
+        return self._oss
+
+    def get_metrics(self) -> dict:
+        """Возвращает метрики работы контроллера:
+            time_ms - время (мс), проведенное на каждом OSS (индекс - OSS);
+            samples - кол-во измерений на каждом OSS;
+            switches - кол-во переключений OSS."""
+        return {"time_ms": tuple(self._time_ms), "samples": tuple(self._samples), "switches": self._switches}
+
+    def reset_metrics(self):
+        """Обнуляет метрики."""
+        for i in range(4):
+            self._time_ms[i] = self._samples[i] = 0
+        self._switches = 0
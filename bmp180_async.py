@@ -0,0 +1,125 @@
+# micropython
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Асинхронная (asyncio) надстройка над драйвером Bmp180.
+Ожидание окончания преобразования не блокирует цикл событий, а транзакции
+нескольких драйверов на одной шине не перемежаются (блокировка шины)."""
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+import time
+
+from bmp180 import Bmp180, TimedParams
+
+class AsyncBusLock:
+    """Блокировка шины для задач asyncio поверх блокировки адаптера (BusAdapter.lock, BusLock).
+    BusLock повторно входима для потока, поэтому не разделяет задачи одного цикла событий:
+    их разделяет asyncio.Lock, а обмены других потоков - сама BusLock, удерживаемая до выхода из блока.
+    Использование: async with get_bus_lock(adapter): ..."""
+
+    def __init__(self, bus_lock):
+        self.bus_lock = bus_lock
+        self._task_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self._task_lock.acquire()
+        try:
+            # шину занял другой поток: ожидание без блокировки цикла событий
+            while not self.bus_lock.acquire(False):
+                await asyncio.sleep(0)
+        except BaseException:
+            self._task_lock.release()
+            raise
+        return self
+
+    async def __aexit__(self, *args):
+        self.bus_lock.release()
+        self._task_lock.release()
+
+    def locked(self) -> bool:
+        return self._task_lock.locked()
+
+
+def get_bus_lock(adapter) -> AsyncBusLock:
+    """Возвращает блокировку шины для задач asyncio, общую для всех драйверов, работающих через адаптер
+    шины adapter (и через адаптеры с той же блокировкой adapter.lock, например InstrumentedAdapter).
+    Используйте ее в других асинхронных драйверах на этой же шине: async with get_bus_lock(adapter): ..."""
+    bus_lock = adapter.lock
+    lock = getattr(bus_lock, "async_lock", None)
+    if lock is None:
+        # хранится в самой блокировке шины: одна на шину, освобождается вместе с адаптером
+        lock = AsyncBusLock(bus_lock)
+        bus_lock.async_lock = lock
+    return lock
+
+
+def _sleep_ms(ms: int):
+    return asyncio.sleep(0.001 * ms)
+
+
+class Bmp180Async:
+    """Асинхронный фасад датчика Bmp180.
+    Example:
+        >>> sensor = Bmp180Async(Bmp180(adapter))
+        >>> mp = await sensor.read()
+        >>> async for mp in sensor.stream(period_ms=100):
+        ...     print(mp.pressure)
+    """
+
+    def __init__(self, sensor: Bmp180, poll_ms: int = 1):
+        """sensor - экземпляр Bmp180; poll_ms - период опроса бита SCO в мс, после истечения
+        времени преобразования (get_conversion_cycle_time), если данные еще не готовы."""
+        self._sensor = sensor
+        self._poll_ms = poll_ms
+        self._bus_lock = get_bus_lock(sensor._connection.adapter)
+        # одновременное чтение одного датчика из нескольких задач
+        self._read_lock = asyncio.Lock()
+
+    @property
+    def sensor(self) -> Bmp180:
+        """Возвращает датчик, над которым построен фасад"""
+        return self._sensor
+
+    async def read(self) -> TimedParams:
+        """Возвращает очередное измерение (см. Bmp180.poll). Во время преобразования
+        управление отдается циклу событий, шина на это время не блокируется."""
+        sensor = self._sensor
+        async with self._read_lock:
+            while True:
+                async with self._bus_lock:
+                    res = sensor.poll()
+                if res is not None:
+                    return res
+                await _sleep_ms(sensor.remaining_ms() or self._poll_ms)
+
+    def stream(self, period_ms: int = 0):
+        """Возвращает асинхронный итератор измерений с периодом period_ms мс.
+        0 - измерения следуют друг за другом без пауз."""
+        return _Stream(self, period_ms)
+
+
+class _Stream:
+    """Асинхронный итератор измерений Bmp180Async.stream. Период отсчитывается от
+    запланированного момента предыдущего измерения, поэтому не накапливает ошибку."""
+
+    def __init__(self, owner: Bmp180Async, period_ms: int):
+        self._owner = owner
+        self._period = period_ms
+        self._deadline = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> TimedParams:
+        period = self._period
+        if self._deadline is None:
+            self._deadline = time.ticks_ms()
+        else:
+            self._deadline = time.ticks_add(self._deadline, period)
+            wait = time.ticks_diff(self._deadline, time.ticks_ms())
+            if wait > 0:
+                await _sleep_ms(wait)
+            else:
+                self._deadline = time.ticks_ms()  # опоздание: новая точка отсчета
+        return await self._owner.read()
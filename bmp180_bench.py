@@ -0,0 +1,259 @@
+# micropython
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Набор тестов производительности драйвера Bmp180 на модели датчика (bmp180_sim), без оборудования.
+Результаты выводятся в стандартный вывод по одной JSON записи в строке (для отслеживания регрессий между версиями).
+
+Запуск:
+    CPython:                     PYTHONPATH=host:. python3 bmp180_bench.py [-n 1000] [-s 20]
+    MicroPython (unix порт):     MICROPYPATH=host:.frozen:. micropython bmp180_bench.py [-n 1000] [-s 20]
+-n - кол-во вызовов для измерения затрат одного вызова метода;
+-s - кол-во измерений для определения достижимой частоты измерений.
+
+Записи:
+    {"bench": "call", "name": <метод>, "us": мкс на вызов, "transactions": транзакций на шине на вызов,
+     "bytes": байт на шине на вызов, "alloc_bytes": байт кучи на вызов, "alloc_peak_bytes": ...,
+     "alloc_src": "mem_alloc" | "tracemalloc", ...}
+    {"bench": "rate", "channels": "T" | "P" | "TP", "oss": 0..3, "refresh_n": ..., "hz": измерений в секунду,
+     "transactions", "bytes", "alloc_bytes" - на одно измерение, ...}
+    Память кучи: MicroPython - gc.mem_alloc() при отключенном сборщике мусора, alloc_bytes - все выделения,
+    alloc_peak_bytes - null. CPython - tracemalloc, отдельным проходом (трассировка замедляет вызовы, поэтому
+    время измеряется без нее): alloc_bytes - прирост занятой памяти на вызов (временные объекты освобождаются
+    сразу и в него не входят), alloc_peak_bytes - наибольший прирост за проход (временные объекты).
+    {"bench": "math", "name": "float" | "int" | "float_direct" | "int_direct", "us": мкс на компенсацию пары UT/UP, ...}
+    *_direct - расчет прямо по калибровочным коэффициентам, без плана компенсации (_build_plan), для сравнения."""
+import gc
+import json
+import sys
+import time
+
+import micropython
+
+from bmp180 import Bmp180, _comp_temp_float, _comp_press_float, _comp_temp_int, _comp_press_int, _idiv
+from bmp180_sim import Bmp180Model, SimBusAdapter
+
+# размер выделенной памяти кучи есть только в MicroPython, в CPython - tracemalloc
+_mem_alloc = getattr(gc, "mem_alloc", None)
+if _mem_alloc is None:
+    import tracemalloc
+
+
+def _impl() -> dict:
+    impl = sys.implementation
+    return {"impl": impl.name, "version": ".".join(str(v) for v in impl.version[:3])}
+
+
+def _emit(record: dict, result: dict):
+    record.update(result)
+    record.update(_impl())
+    print(json.dumps(record))
+
+
+class _Meter:
+    """Замер времени, обмена по шине и выделения памяти кучи для группы вызовов.
+    traced - проход с трассировкой выделений памяти tracemalloc (CPython)."""
+
+    def __init__(self, adapter: SimBusAdapter, traced: bool = False):
+        self._adapter = adapter
+        self._traced = traced
+        self.us = 0
+        self.alloc = 0
+        self.peak = 0
+        adapter.reset_counters()
+
+    def __enter__(self):
+        gc.collect()
+        if _mem_alloc is not None:
+            gc.disable()
+            self._mem = _mem_alloc()
+        elif self._traced:
+            tracemalloc.reset_peak()
+            self._mem = tracemalloc.get_traced_memory()[0]
+        self._t = time.ticks_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.us += time.ticks_diff(time.ticks_us(), self._t)
+        if _mem_alloc is not None:
+            self.alloc += _mem_alloc() - self._mem
+            gc.enable()
+        elif self._traced:
+            current, peak = tracemalloc.get_traced_memory()
+            self.alloc += current - self._mem
+            self.peak = max(self.peak, peak - self._mem)
+
+    def result(self, count: int) -> dict:
+        adapter = self._adapter
+        return {"count": count,
+                "us": round(self.us / count, 3),
+                "transactions": round(adapter.transactions / count, 3),
+                "bytes": round((adapter.bytes_read + adapter.bytes_written) / count, 3),
+                "alloc_bytes": round(self.alloc / count, 3),
+                "alloc_peak_bytes": self.peak if self._traced else None,
+                "alloc_src": "tracemalloc" if self._traced else "mem_alloc"}
+
+
+def _measure(adapter: SimBusAdapter, count: int, run) -> dict:
+    """Выполняет замер run(meter) (run выполняет нагрузку внутри with meter: ...) и возвращает результат
+    для count вызовов. В CPython память кучи измеряется вторым проходом, с tracemalloc."""
+    meter = _Meter(adapter)
+    run(meter)
+    res = meter.result(count)
+    if _mem_alloc is None:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        try:
+            meter = _Meter(adapter, traced=True)
+            run(meter)
+        finally:
+            if started:
+                tracemalloc.stop()
+        traced = meter.result(count)
+        for key in "alloc_bytes", "alloc_peak_bytes", "alloc_src":
+            res[key] = traced[key]
+    return res
+
+
+def _sensor(timing: bool, oss: int = 3) -> tuple:
+    """Возвращает (датчик, адаптер шины с моделью)."""
+    adapter = SimBusAdapter(Bmp180Model(timing=timing))
+    return Bmp180(adapter, oss=oss), adapter
+
+
+def bench_calls(count: int):
+    """Затраты одного вызова методов драйвера. Преобразования в модели завершаются мгновенно.
+    poll_idle - вызов poll во время ожидания окончания преобразования (без обмена по шине).
+    Затраты полного цикла измерения (с ожиданием) смотри в bench_rate."""
+    ps, adapter = _sensor(timing=False)
+    ps.set_channels(temp_en=True, press_en=True)
+    ps.set_temp_refresh(every_n=1)
+    next(ps)    # заполнение _B5 и регистров результата
+
+    for name, func in (("start_measurement", ps.start_measurement),
+                       ("get_data_status", ps.get_data_status),
+                       ("get_temperature", ps.get_temperature),
+                       ("get_pressure", ps.get_pressure),
+                       ("get_temperature_int", ps.get_temperature_int),
+                       ("get_pressure_int", ps.get_pressure_int),
+                       ("poll_idle", ps.poll)):
+        func()  # первый вызов вне замера
+        _emit({"bench": "call", "name": name}, _measure(adapter, count, _loop(func, count)))
+
+    # калибровка читается однократно, массив коэффициентов очищается вне замера
+    n = max(1, count // 10)
+
+    def read_calibration(meter):
+        for _ in range(n):
+            ps._cfa = ps._cfa[:0]
+            with meter:
+                ps._read_calibration_data()
+
+    _emit({"bench": "call", "name": "_read_calibration_data"}, _measure(adapter, n, read_calibration))
+
+
+def _loop(func, count: int):
+    """Нагрузка для _measure: count вызовов func()."""
+    def run(meter):
+        with meter:
+            for _ in range(count):
+                func()
+    return run
+
+
+def _math_float(plan, ut: int, up: int):
+    t, b5 = _comp_temp_float(plan, ut)
+    return t, _comp_press_float(plan, up, b5)
+
+
+def _math_int(plan, ut: int, up: int):
+    t, b5 = _comp_temp_int(plan, ut)
+    return t, _comp_press_int(plan, up, b5)
+
+
+@micropython.native
+def _math_float_direct(args, ut: int, up: int):
+    """Вещественная компенсация без плана: константы вычисляются из cfa, pre и oss при каждом вызове."""
+    cfa, pre, oss = args
+    a = pre[0] * (ut - cfa[5])
+    b5 = a + pre[1] / (a + cfa[10])
+    t = 6.25E-3 * (b5 + 8)
+    b6 = b5 - 4000
+    b3 = (2 + ((pre[2] * b6 ** 2 + pre[3] * b6 + 4 * cfa[0]) * 2 ** oss)) / 4
+    x3 = (2 + b6 * pre[4] + pre[5] * b6 ** 2) / 4
+    b4 = pre[6] * (x3 + 32768)
+    p = 2 * (abs(up) - b3) * (50000 / 2 ** oss) / b4
+    return t, p + 6.25E-2 * (7.073394953E-7 * p ** 2 - 0.1122589111328125 * p + 3791)
+
+
+@micropython.native
+def _math_int_direct(args, ut: int, up: int):
+    """Целочисленная компенсация без плана: коэффициенты выбираются из cfa по индексам при каждом вызове."""
+    cfa, _, oss = args
+    x1 = ((ut - cfa[5]) * cfa[4]) >> 15
+    b5 = x1 + _idiv(cfa[9] << 11, x1 + cfa[10])
+    b6 = b5 - 4000
+    b6_sq = (b6 * b6) >> 12
+    b3 = _idiv(((((cfa[0] << 2) + ((cfa[7] * b6_sq) >> 11) + ((cfa[1] * b6) >> 11)) << oss) + 2), 4)
+    x3 = (((cfa[2] * b6) >> 13) + ((cfa[6] * b6_sq) >> 16) + 2) >> 2
+    b4 = (cfa[3] * (x3 + 32768)) >> 15
+    b7 = ((up - b3) * (50000 >> oss)) & 0xFFFF_FFFF
+    p = (b7 << 1) // b4 if b7 < 0x8000_0000 else (b7 // b4) << 1
+    x1 = (((p >> 8) * (p >> 8)) * 3038) >> 16
+    return (b5 + 8) >> 4, p + ((x1 + ((-7357 * p) >> 16) + 3791) >> 4)
+
+
+def _math_loop(func, count: int, args, ut: int, up: int):
+    """Нагрузка для _measure: count компенсаций func(args, ut, up), без упаковки аргументов (*args выделял бы
+    память кучи в MicroPython)."""
+    def run(meter):
+        with meter:
+            for _ in range(count):
+                func(args, ut, up)
+    return run
+
+
+def bench_math(count: int):
+    """Затраты компенсации одной пары UT/UP (без обмена по шине): вещественный и целочисленный алгоритмы,
+    с планом компенсации (как в драйвере) и без него (*_direct).
+    На MCU без FPU целочисленный алгоритм (Bmp180(int_math=True)) может оказаться быстрее."""
+    ps, adapter = _sensor(timing=False)
+    oss = 3
+    plan, direct = ps._plans[oss], (ps._cfa, ps._pre, oss)
+    ut, up = 27898, 23843 << oss  # пример из документации
+    # проверка: варианты без плана вычисляют то же, что и драйвер
+    assert _math_int_direct(direct, ut, up) == _math_int(plan, ut, up)
+    assert abs(_math_float_direct(direct, ut, up)[1] - _math_float(plan, ut, up)[1]) < 1E-6
+    for name, func, args in (("float", _math_float, plan), ("int", _math_int, plan),
+                             ("float_direct", _math_float_direct, direct), ("int_direct", _math_int_direct, direct)):
+        func(args, ut, up)
+        _emit({"bench": "math", "name": name}, _measure(adapter, count, _math_loop(func, count, args, ut, up)))
+
+
+def bench_rate(samples: int):
+    """Достижимая частота измерений с временем преобразования из документации, по OSS и набору каналов."""
+    for channels, temp_en, press_en, refresh_n in (("T", True, False, 0), ("P", False, True, 0),
+                                                   ("TP", True, True, 1), ("TP", True, True, 10)):
+        for oss in range(4):
+            if not press_en and oss:
+                continue    # OSS не влияет на измерение температуры
+            ps, adapter = _sensor(timing=True, oss=oss)
+            ps.set_channels(temp_en=temp_en, press_en=press_en)
+            ps.set_temp_refresh(every_n=refresh_n)
+            next(ps)
+            res = _measure(adapter, samples, _loop(ps.__next__, samples))
+            res["hz"] = round(1_000_000 / res["us"], 2)
+            _emit({"bench": "rate", "channels": channels, "oss": oss, "refresh_n": refresh_n}, res)
+
+
+def _arg(name: str, default: int) -> int:
+    argv = sys.argv
+    if name in argv:
+        return int(argv[argv.index(name) + 1])
+    return default
+
+
+if __name__ == "__main__":
+    bench_calls(_arg("-n", 1000))
+    bench_math(_arg("-n", 1000))
+    bench_rate(_arg("-s", 20))
@@ -0,0 +1,157 @@
+# micropython
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Групповое (конвейерное) измерение несколькими датчиками Bmp180.
+Преобразования запускаются во всех датчиках сразу, ожидание выполняется один раз,
+поэтому суммарная частота измерений растет с количеством датчиков."""
+import array
+import time
+
+
+class MuxBus:
+    """Мультиплексоры шины I2C (TCA9548A и подобные) на одном адаптере шины.
+    У всех BMP180 один адрес (0x77), поэтому при выборе канала одного мультиплексора каналы остальных
+    мультиплексоров на той же шине отключаются (в них записывается 0), иначе отвечали бы несколько датчиков.
+    Запоминает состояние мультиплексоров и не повторяет запись уже установленного значения."""
+
+    def __init__(self, adapter, mux_addresses=()):
+        """adapter - адаптер шины; mux_addresses - адреса всех мультиплексоров на этой шине.
+        Мультиплексоры, для которых создается selector, добавляются автоматически."""
+        self._adapter = adapter
+        # маска включенных каналов по адресу мультиплексора; None - состояние неизвестно
+        self._masks = {}
+        self._buf = bytearray(1)
+        for addr in mux_addresses:
+            self._masks[addr] = None
+
+    def _write(self, mux_address: int, mask: int):
+        self._masks[mux_address] = None     # при ошибке обмена состояние остается неизвестным
+        self._buf[0] = mask
+        self._adapter.write(mux_address, self._buf)
+        self._masks[mux_address] = mask
+
+    def select(self, mux_address: int, channel: int | None):
+        """Включает канал channel (0..7) мультиплексора mux_address и отключает каналы остальных.
+        channel None - отключает каналы всех мультиплексоров."""
+        masks = self._masks
+        if mux_address not in masks:
+            masks[mux_address] = None
+        mask = 0 if channel is None else 1 << channel
+        with self._adapter.transaction():
+            for addr in masks:
+                if addr != mux_address and 0 != masks[addr]:
+                    self._write(addr, 0)
+            if mask != masks[mux_address]:
+                self._write(mux_address, mask)
+
+    def selector(self, mux_address: int, channel: int):
+        """Возвращает функцию выбора канала channel мультиплексора mux_address (для selectors Bmp180Group)."""
+        if mux_address not in self._masks:
+            self._masks[mux_address] = None
+
+        def select():
+            self.select(mux_address, channel)
+
+        return select
+
+
+def get_mux_bus(adapter) -> MuxBus:
+    """Возвращает MuxBus, общий для всех мультиплексоров на адаптере шины adapter."""
+    mux_bus = getattr(adapter, "mux_bus", None)
+    if mux_bus is None:
+        mux_bus = MuxBus(adapter)
+        adapter.mux_bus = mux_bus
+    return mux_bus
+
+
+def mux_selector(adapter, mux_address: int, channel: int):
+    """Возвращает функцию выбора канала channel (0..7) мультиплексора шины I2C (TCA9548A и подобные)
+    с адресом mux_address. Используйте ее в качестве элемента списка selectors класса Bmp180Group.
+    Каналы других мультиплексоров на той же шине при выборе отключаются (см. MuxBus)."""
+    return get_mux_bus(adapter).selector(mux_address, channel)
+
+
+class Bmp180Group:
+    """Менеджер группового измерения.
+    Example:
+        >>> group = Bmp180Group([Bmp180(adapter_0), Bmp180(adapter_1)])
+        >>> for mp in group.acquire():
+        ...     print(mp.pressure)
+        >>> print(group.get_latency_us())
+    """
+
+    def __init__(self, sensors: list, selectors: list | None = None, timeout_ms: int = 100):
+        """sensors - список экземпляров Bmp180 (на одной или разных шинах);
+        selectors - None или список той же длины, элемент которого - функция без параметров,
+        переключающая мультиплексор на датчик с тем же индексом (смотри mux_selector), или None;
+        timeout_ms - время в мс сверх времени преобразования, после которого датчик, не выдавший
+        результат, пропускается (его результат будет None)."""
+        if selectors is not None and len(selectors) != len(sensors):
+            raise ValueError(f"selectors length must be {len(sensors)}")
+        self._sensors = sensors
+        self._selectors = selectors
+        self._timeout = timeout_ms
+        self._current = None    # функция выбора канала, вызванная последней
+        # задержка (мкс) от запуска преобразования до получения результата, по индексу датчика
+        self._latency = array.array("L", (0 for _ in sensors))
+
+    def __len__(self) -> int:
+        return len(self._sensors)
+
+    def _select(self, index: int):
+        """Переключает мультиплексор на датчик с индексом index, если это необходимо."""
+        if self._selectors is None:
+            return
+        sel = self._selectors[index]
+        if sel is not None and sel is not self._current:
+            sel()
+            self._current = sel
+
+    def _poll(self, index: int, results: list, pending: list, started: int):
+        """Опрос датчика с индексом index. Результат записывается в results, датчик, выдавший результат
+        или не ответивший на шине (OSError), удаляется из pending."""
+        try:
+            self._select(index)
+            res = self._sensors[index].poll()
+        except OSError:
+            self._current = None    # состояние мультиплексора неизвестно
+            self._latency[index] = 0
+            pending.remove(index)
+            return
+        if res is not None:
+            results[index] = res
+            self._latency[index] = time.ticks_diff(time.ticks_us(), started)
+            pending.remove(index)
+
+    def acquire(self) -> list:
+        """Выполняет одно измерение всеми датчиками группы. Возвращает список TimedParams по индексу
+        датчика. None - датчик не ответил за время timeout_ms или обмен с ним завершился ошибкой (OSError);
+        ошибка одного датчика не прерывает измерение остальными.
+        Если преобразование, оставшееся от предыдущего вызова (по таймауту), уже завершено, его результат
+        возвращается как результат этого вызова."""
+        sensors = self._sensors
+        results = [None for _ in sensors]
+        pending = list(range(len(sensors)))
+        started = time.ticks_us()
+        # запуск преобразований во всех датчиках
+        for index in tuple(pending):
+            self._poll(index, results, pending, started)
+        max_wait = max(s.get_conversion_cycle_time() for s in sensors) if sensors else 0
+        # измерение может состоять из двух преобразований (T, затем P)
+        deadline = time.ticks_add(time.ticks_ms(), 2 * max_wait + self._timeout)
+        while pending:
+            # одно ожидание на всю группу: до окончания самого долгого преобразования
+            wait = max(sensors[index].remaining_ms() for index in pending)
+            time.sleep_ms(wait or 1)
+            for index in tuple(pending):
+                self._poll(index, results, pending, started)
+            if pending and time.ticks_diff(time.ticks_ms(), deadline) > 0:
+                for index in pending:
+                    self._latency[index] = 0
+                break
+        return results
+
+    def get_latency_us(self) -> array.array:
+        """Возвращает задержку (мкс) последнего вызова acquire() по индексу датчика.
+        0 - датчик не выдал результат."""
+        return self._latency
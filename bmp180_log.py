@@ -0,0 +1,212 @@
+# micropython
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Компактный двоичный журнал сырых измерений BMP180 (вместо текстового вывода, см. data_from_sensor).
+
+Формат файла (порядок байт - little endian):
+    заголовок (_HDR_FMT): сигнатура b"B18L", версия, chip_id, OSS (на момент создания), резерв,
+        калибровочные коэффициенты AC1..MD (_cfa);
+    далее блоки записей. Блок начинается с опорной записи (_BLK_FMT): кол-во записей в блоке (включая опорную),
+        OSS, резерв, время от начала журнала в мс, UT, UP. За ней следуют записи фиксированной длины (_REC_FMT):
+        приращение времени в мс, приращение UT, приращение UP относительно предыдущей записи.
+    Если приращение не помещается в запись, или изменился OSS, то начинается новый блок.
+
+Запись - 6 байт на измерение (текстовая строка - около 100 байт). Значения сохраняются сырыми,
+компенсация выполняется при чтении (bmp180.compensate), поэтому точность не теряется."""
+import struct
+
+try:
+    from time import ticks_diff
+except ImportError:
+    def ticks_diff(new, old):
+        return new - old
+
+LOG_MAGIC = b"B18L"
+LOG_VERSION = 1
+_HDR_FMT = "<4sBBBBhhhHHHhhhhh"     # 30 байт
+_BLK_FMT = "<HBBIHI"                # 14 байт
+_REC_FMT = "<Hhh"                   # 6 байт
+_HDR_SIZE = struct.calcsize(_HDR_FMT)
+_BLK_SIZE = struct.calcsize(_BLK_FMT)
+_REC_SIZE = struct.calcsize(_REC_FMT)
+
+
+def _fits_i16(value: int) -> bool:
+    return -32768 <= value <= 32767
+
+
+class LogWriter:
+    """Буферизованная запись журнала блоками. Память под блок выделяется один раз, в конструкторе.
+    Example:
+        >>> with open("press.b18", "wb") as f:
+        ...     log = LogWriter(f, sensor)
+        ...     for mp in sensor.measurements(1000):
+        ...         log.append_from(sensor, mp.timestamp)
+        ...     log.close()
+    """
+
+    def __init__(self, stream, sensor, block_size: int = 128):
+        """stream - открытый на запись двоичный файл (поток с методом write);
+        sensor - датчик Bmp180 (калибровочные коэффициенты, chip_id, OSS для заголовка);
+        block_size - наибольшее кол-во записей в блоке (2..65535). Блок записывается в stream целиком."""
+        if not 2 <= block_size <= 0xFFFF:
+            raise ValueError(f"Invalid block_size value: {block_size}")
+        self._stream = stream
+        self._block_size = block_size
+        self._oss = sensor.set_oversampling().pressure
+        cfa = [sensor.get_calibration(i) for i in range(sensor.get_calibration(None))]
+        stream.write(struct.pack(_HDR_FMT, LOG_MAGIC, LOG_VERSION, sensor.get_id().chip_id, self._oss, 0, *cfa))
+        self._buf = bytearray(_BLK_SIZE + _REC_SIZE * (block_size - 1))
+        self._mv = memoryview(self._buf)
+        self._count = 0         # кол-во записей в текущем блоке
+        self._blk_oss = 0       # OSS текущего блока
+        self._time = 0          # время последней записи от начала журнала, мс
+        self._ticks = None      # ticks_ms последней записи
+        self._ut = 0            # UT последней записи
+        self._up = 0            # UP последней записи
+        self._total = 0         # всего записей в журнале
+
+    def append(self, ticks: int, ut: int, up: int, oss: int | None = None):
+        """Добавляет запись. ticks - время измерения (time.ticks_ms()); ut, up - сырые значения;
+        oss - OSS, с которым получено up. None - OSS из заголовка."""
+        if oss is None:
+            oss = self._oss
+        dt = 0 if self._ticks is None else ticks_diff(ticks, self._ticks)
+        self._time += dt
+        d_ut, d_up = ut - self._ut, up - self._up
+        count = self._count
+        if count and (oss != self._blk_oss or not 0 <= dt <= 0xFFFF or not _fits_i16(d_ut) or not _fits_i16(d_up)
+                      or count == self._block_size):
+            self.flush()
+            count = 0
+        if count:
+            struct.pack_into(_REC_FMT, self._buf, _BLK_SIZE + _REC_SIZE * (count - 1), dt, d_ut, d_up)
+        else:
+            self._blk_oss = oss
+            struct.pack_into(_BLK_FMT, self._buf, 0, 1, oss, 0, self._time & 0xFFFFFFFF, ut, up)
+        self._count = count + 1
+        self._ticks, self._ut, self._up = ticks, ut, up
+        self._total += 1
+
+    def append_from(self, sensor, ticks: int):
+        """Добавляет последние сырые значения датчика (Bmp180.get_raw), полученные в момент ticks (ticks_ms),
+        с OSS, который датчик фактически использовал для UP."""
+        ut, up, oss = sensor.get_raw()
+        self.append(ticks, ut, up, oss)
+
+    def set_oss(self, oss: int):
+        """Задает OSS для последующих записей append без параметра oss."""
+        self._oss = oss
+
+    def flush(self):
+        """Записывает текущий блок (если он не пуст) в поток."""
+        count = self._count
+        if not count:
+            return
+        struct.pack_into("<H", self._buf, 0, count)
+        self._stream.write(self._mv[:_BLK_SIZE + _REC_SIZE * (count - 1)])
+        self._count = 0
+
+    def close(self):
+        """Записывает текущий блок. Поток не закрывается."""
+        self.flush()
+        if hasattr(self._stream, "flush"):
+            self._stream.flush()
+
+    def __len__(self) -> int:
+        return self._total
+
+
+class LogReader:
+    """Чтение журнала на компьютере (CPython + NumPy). Файл отображается в память (mmap).
+    Example:
+        >>> log = LogReader("press.b18")
+        >>> t_ms, ut, up, oss = log.to_numpy()
+        >>> temperature, pressure = log.compensate()
+    """
+
+    def __init__(self, path: str):
+        import mmap
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _HDR_SIZE:
+            raise ValueError(f"Not a BMP180 log: {path}")
+        hdr = struct.unpack_from(_HDR_FMT, self._mm, 0)
+        if hdr[0] != LOG_MAGIC:
+            raise ValueError(f"Not a BMP180 log: {path}")
+        if hdr[1] != LOG_VERSION:
+            raise ValueError(f"Unsupported log version: {hdr[1]}")
+        self.chip_id = hdr[2]
+        self.oss = hdr[3]
+        self.cfa = hdr[5:]
+
+    def _blocks(self):
+        """Возвращает список (смещение записей, кол-во записей, oss, time, ut, up) по полным блокам файла.
+        Неполный последний блок (прерванная запись) пропускается."""
+        mm, size = self._mm, len(self._mm)
+        offs, res = _HDR_SIZE, []
+        while offs + _BLK_SIZE <= size:
+            count, oss, _, t, ut, up = struct.unpack_from(_BLK_FMT, mm, offs)
+            end = offs + _BLK_SIZE + _REC_SIZE * (count - 1)
+            if not count or end > size:
+                break
+            res.append((offs + _BLK_SIZE, count, oss, t, ut, up))
+            offs = end
+        return res
+
+    def __len__(self) -> int:
+        return sum(blk[1] for blk in self._blocks())
+
+    def __iter__(self):
+        """Перебор записей (время от начала журнала в мс, UT, UP, OSS) без NumPy."""
+        mm = self._mm
+        for offs, count, oss, t, ut, up in self._blocks():
+            yield t, ut, up, oss
+            for i in range(count - 1):
+                dt, d_ut, d_up = struct.unpack_from(_REC_FMT, mm, offs + _REC_SIZE * i)
+                t, ut, up = t + dt, ut + d_ut, up + d_up
+                yield t, ut, up, oss
+
+    def to_numpy(self) -> tuple:
+        """Возвращает массивы NumPy (время от начала журнала в мс, UT, UP, OSS) одинаковой длины."""
+        import numpy as np
+        blocks = self._blocks()
+        n = sum(blk[1] for blk in blocks)
+        # приращения всех записей; опорная запись блока задает абсолютные значения
+        d_t = np.empty(n, dtype=np.int64)
+        d_ut = np.empty(n, dtype=np.int64)
+        d_up = np.empty(n, dtype=np.int64)
+        oss = np.empty(n, dtype=np.uint8)
+        rec = np.dtype([("dt", "<u2"), ("dut", "<i2"), ("dup", "<i2")])
+        prev_t = prev_ut = prev_up = 0
+        i = 0
+        for offs, count, blk_oss, t, ut, up in blocks:
+            d_t[i], d_ut[i], d_up[i] = t - prev_t, ut - prev_ut, up - prev_up
+            if count > 1:
+                r = np.frombuffer(self._mm, dtype=rec, count=count - 1, offset=offs)
+                d_t[i + 1:i + count] = r["dt"]
+                d_ut[i + 1:i + count] = r["dut"]
+                d_up[i + 1:i + count] = r["dup"]
+            oss[i:i + count] = blk_oss
+            last = i + count
+            prev_t = t + int(d_t[i + 1:last].sum())
+            prev_ut = ut + int(d_ut[i + 1:last].sum())
+            prev_up = up + int(d_up[i + 1:last].sum())
+            i = last
+        return np.cumsum(d_t), np.cumsum(d_ut), np.cumsum(d_up), oss
+
+    def compensate(self, int_math: bool = False) -> tuple:
+        """Возвращает массивы NumPy (температура, давление), вычисленные bmp180.compensate
+        по калибровочным коэффициентам из заголовка журнала."""
+        import numpy as np
+        from bmp180 import compensate
+        _, ut, up, oss = self.to_numpy()
+        temp = np.empty(len(ut), dtype=np.int64 if int_math else np.float64)
+        press = np.empty_like(temp)
+        for value in np.unique(oss):
+            mask = oss == value
+            temp[mask], press[mask] = compensate(self.cfa, ut[mask], up[mask], int(value), int_math)
+        return temp, press
+
+    def close(self):
+        self._mm.close()
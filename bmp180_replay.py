@@ -0,0 +1,210 @@
+# micropython
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Воспроизведение записанных сессий измерений через шину (регрессионные тесты фильтров, оценка производительности).
+Источники: двоичный журнал сырых значений (bmp180_log) или текстовый вывод main.py (data_from_sensor/pressure.txt).
+Записанные значения возвращаются драйверу Bmp180 через регистры модели датчика (bmp180_sim), по времени записи.
+
+Ускоренное воспроизведение (только CPython, каталог host в пути поиска модулей): VirtualClock подменяет функции
+ticks_*/sleep_* модуля time, поэтому ускоряется весь конвейер: драйвер, фильтры, запись результатов.
+    >>> from bmp180 import Bmp180
+    >>> from bmp180_replay import open_text, VirtualClock
+    >>> with VirtualClock(speed=None):    # без ожидания
+    ...     adapter = open_text("data_from_sensor/pressure.txt")
+    ...     ps = Bmp180(adapter)
+    ...     while not adapter.bus.finished:
+    ...         mp = next(ps)
+"""
+import array
+import time
+
+from bmp180 import Bmp180
+from bmp180_sim import Bmp180Model, SimBusAdapter, DATASHEET_CALIBRATION
+
+
+class ReplayModel(Bmp180Model):
+    """Модель BMP180, возвращающая записанные сырые значения UT/UP по времени от начала воспроизведения."""
+
+    def __init__(self, calibration, times_ms, ut, up, oss, loop: bool = False):
+        """calibration - 11 калибровочных коэффициентов AC1..MD, с которыми сделана запись;
+        times_ms - время записей от начала сессии, мс (неубывающая последовательность);
+        ut, up - сырые значения температуры и давления по записям;
+        oss - OSS, с которым получено up: число или последовательность по записям;
+        loop - если Истина, то по окончании записи воспроизведение начинается сначала,
+            иначе возвращается последняя запись и finished становится Истиной."""
+        if not len(times_ms) or len(times_ms) != len(ut) or len(ut) != len(up):
+            raise ValueError("Empty session or record length mismatch")
+        super().__init__(calibration=calibration)
+        self._times = times_ms
+        self._rec_ut = ut
+        self._rec_up = up
+        self._oss = oss
+        self.loop = loop
+        # длительность сессии: последняя запись плюс средний период между записями
+        n = len(times_ms)
+        self._duration = times_ms[-1] + max(1, (times_ms[-1] - times_ms[0]) // (n - 1) if n > 1 else 1)
+        self._cursor = 0
+        self._laps = 0          # кол-во полных проходов записи
+        self.finished = False
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def _index(self, t: float) -> int:
+        """Индекс последней записи, сделанной не позднее t секунд от начала воспроизведения."""
+        t_ms = int(t * 1000)
+        times, n = self._times, len(self._times)
+        if self.loop:
+            t_ms, laps = t_ms % self._duration, t_ms // self._duration
+            if laps != self._laps:
+                self._laps, self._cursor = laps, 0
+        elif t_ms >= self._duration:
+            self.finished = True
+        i = self._cursor
+        while i + 1 < n and times[i + 1] <= t_ms:
+            i += 1
+        self._cursor = i
+        return i
+
+    def raw_temperature(self, t: float) -> int:
+        return self._rec_ut[self._index(t)]
+
+    def raw_pressure(self, t: float, oss: int) -> int:
+        i = self._index(t)
+        rec_oss = self._oss if isinstance(self._oss, int) else self._oss[i]
+        up = self._rec_up[i]
+        # приведение к OSS, запрошенному драйвером
+        return up << (oss - rec_oss) if oss >= rec_oss else up >> (rec_oss - oss)
+
+
+def open_log(path: str, loop: bool = False, address: int = 0x77) -> SimBusAdapter:
+    """Адаптер шины, воспроизводящий двоичный журнал bmp180_log."""
+    from bmp180_log import LogReader
+    log = LogReader(path)
+    times, ut, up, oss = array.array("l"), array.array("l"), array.array("l"), array.array("B")
+    for rec in log:
+        times.append(rec[0])
+        ut.append(rec[1])
+        up.append(rec[2])
+        oss.append(rec[3])
+    log.close()
+    return SimBusAdapter(ReplayModel(log.cfa, times, ut, up, oss, loop), address)
+
+
+def _field(line: str, name: str) -> str | None:
+    """Значение (первое слово) после name в строке текстового вывода, или None."""
+    pos = line.find(name)
+    if pos < 0:
+        return None
+    return line[pos + len(name):].split()[0]
+
+
+def open_text(path: str, oss: int = 3, period_ms: int | None = None, loop: bool = False,
+              address: int = 0x77) -> SimBusAdapter:
+    """Адаптер шины, воспроизводящий текстовый вывод main.py (например, data_from_sensor/pressure.txt).
+    Значения температуры и давления пересчитываются в сырые по калибровочным коэффициентам из текста
+    (строка вида [AC1, ..., MD]) или из примера документации, если их нет.
+    oss - OSS, с которым было измерено давление;
+    period_ms - период записей без метки времени (ticks), мс. None - из поля Delay для температуры
+        и время преобразования для давления."""
+    cal = DATASHEET_CALIBRATION
+    times, temps, presses = [], [], []
+    t_ms, t0 = 0, None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("[") and line.endswith("]"):
+                cal = tuple(int(v) for v in line[1:-1].split(","))
+                continue
+            if line.startswith("Air pressure:"):
+                press = float(_field(line, "Air pressure:"))
+                default_ms = Bmp180.get_press_conversion_time(oss)
+            elif line.startswith("Air temperature:"):
+                press = None
+                default_ms = int(_field(line, "Delay:") or Bmp180.get_press_conversion_time(0))
+            else:
+                continue
+            temp = _field(line, "Air temperature:")
+            ticks = _field(line, "ticks:")
+            if ticks is not None:
+                t0 = int(ticks) if t0 is None else t0
+                t_ms = int(ticks) - t0
+            elif times:
+                t_ms += default_ms if period_ms is None else period_ms
+            times.append(t_ms)
+            temps.append(None if temp is None else float(temp))
+            presses.append(press)
+    # пропуски заполняются ближайшим предыдущим значением, начало - первым известным
+    for values, default in ((temps, 25.0), (presses, 101325.0)):
+        known = [v for v in values if v is not None]
+        last = known[0] if known else default
+        for i, v in enumerate(values):
+            if v is None:
+                values[i] = last
+            last = values[i]
+    # пересчет в сырые значения обращением компенсации
+    model = Bmp180Model(calibration=cal)
+    ut, up = array.array("l"), array.array("l")
+    for temp, press in zip(temps, presses):
+        model.temperature, model.pressure = temp, press
+        ut.append(model.raw_temperature(0))
+        up.append(model.raw_pressure(0, oss))
+    return SimBusAdapter(ReplayModel(cal, array.array("l", times), ut, up, oss, loop), address)
+
+
+class VirtualClock:
+    """Виртуальное время для ускоренного воспроизведения на компьютере (CPython, заглушки каталога host).
+    Подменяет time.ticks_ms/ticks_us/ticks_cpu/sleep_ms/sleep_us/sleep на время install() .. uninstall().
+    speed - ускорение: время идет в speed раз быстрее реального, паузы в speed раз короче;
+        None - паузы не выполняются, а только продвигают виртуальное время (наибольшая скорость)."""
+    _NAMES = ("ticks_ms", "ticks_us", "ticks_cpu", "sleep_ms", "sleep_us", "sleep")
+
+    def __init__(self, speed: float | None = None):
+        if speed is not None and speed <= 0:
+            raise ValueError(f"Invalid speed value: {speed}")
+        self.speed = speed
+        self._saved = None
+
+    def _us(self) -> int:
+        """Виртуальное время от install(), мкс."""
+        real = (self._perf() - self._start) / 1000
+        return int(real * (self.speed or 1)) + self._skipped
+
+    def _sleep_us(self, us: float):
+        if us <= 0:
+            return
+        if self.speed is None:
+            self._skipped += int(us)
+        else:
+            self._real_sleep(us / 1_000_000 / self.speed)
+
+    def install(self):
+        import micropython     # noqa: F401  функции ticks_* в модуле time (host/micropython.py)
+        if self._saved is not None:
+            return
+        self._saved = {name: getattr(time, name) for name in VirtualClock._NAMES}
+        self._perf = time.perf_counter_ns
+        self._real_sleep = self._saved["sleep"]
+        self._start = self._perf()
+        self._skipped = 0
+        mask = (1 << 30) - 1
+        time.ticks_us = lambda: self._us() & mask
+        time.ticks_ms = lambda: (self._us() // 1000) & mask
+        time.ticks_cpu = time.ticks_us
+        time.sleep_us = self._sleep_us
+        time.sleep_ms = lambda ms: self._sleep_us(ms * 1000)
+        time.sleep = lambda s: self._sleep_us(s * 1_000_000)
+
+    def uninstall(self):
+        if self._saved is None:
+            return
+        for name, func in self._saved.items():
+            setattr(time, name, func)
+        self._saved = None
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *args):
+        self.uninstall()
@@ -0,0 +1,274 @@
+# micropython
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Программная модель BMP180 и адаптер шины к ней, для работы драйвера без датчика (тесты, профилирование).
+Модель содержит регистры датчика: ID (0xD0, значение 0x55), калибровочные коэффициенты (0xAA..0xBF),
+SOFT_RESET (0xE0), CTRL_MEAS (0xF4) с битом SCO, OUT_MSB/LSB/XLSB (0xF6..0xF8).
+Время преобразования соответствует документации для каждого OSS. Температура и давление задаются
+постоянными значениями или функциями времени (sine, ramp, step), к ним может добавляться шум.
+
+Под CPython добавьте каталог host в путь поиска модулей (заглушки machine и micropython):
+    PYTHONPATH=host:. python3
+    >>> from bmp180 import Bmp180
+    >>> from bmp180_sim import SimBusAdapter, Bmp180Model, sine
+    >>> ps = Bmp180(SimBusAdapter(Bmp180Model(pressure=sine(101325, 50, 10), press_noise=3)))
+"""
+import math
+import random
+import time
+
+from sensor_pack_2.bus_service import BusAdapter, to_buf
+from bmp180 import _build_plan, _precalc, _comp_temp_float, _comp_press_float
+
+# калибровочные коэффициенты AC1..MD из примера документации (datasheet)
+DATASHEET_CALIBRATION = (408, -72, -14383, 32741, 32757, 23153, 6190, 4, -32768, -8711, 2868)
+# наибольшее время преобразования по документации, мкс: температура, давление по индексу OSS
+CONV_TIME_TEMP_US = 4500
+CONV_TIME_PRESS_US = (4500, 7500, 13500, 25500)
+
+_REG_CALIB = 0xAA
+_REG_ID = 0xD0
+_REG_SOFT_RESET = 0xE0
+_REG_CTRL = 0xF4
+_REG_OUT_MSB = 0xF6
+_MSK_BIT_SCO = 0b10_0000
+_CHIP_ID = 0x55
+_ENODEV = 19
+
+
+def sine(mean: float, amplitude: float, period_s: float):
+    """Синусоида: mean + amplitude * sin(2 * pi * t / period_s). t - время в секундах."""
+    k = 2 * math.pi / period_s
+    return lambda t: mean + amplitude * math.sin(k * t)
+
+
+def ramp(start: float, rate: float):
+    """Линейное изменение: start + rate * t. rate - скорость изменения в единицах в секунду.
+    Например, подъем со скоростью 1 м/с у поверхности Земли - около -12 Па/с."""
+    return lambda t: start + rate * t
+
+
+def step(before: float, after: float, at_s: float):
+    """Скачок значения с before на after в момент времени at_s, секунд."""
+    return lambda t: before if t < at_s else after
+
+
+def _gauss() -> float:
+    """Нормально распределенная случайная величина (0, 1): сумма 12 равномерно распределенных величин.
+    random.gauss отсутствует в MicroPython."""
+    s = 0
+    for _ in range(12):
+        s += random.getrandbits(24)
+    return s / 16777216 - 6
+
+
+def _bisect(func, target: float, hi: int) -> int:
+    """Наименьшее целое x в диапазоне 0..hi, для которого монотонно возрастающая func(x) >= target."""
+    lo = 0
+    while lo < hi:
+        mid = (lo + hi) >> 1
+        if func(mid) < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class Bmp180Model:
+    """Модель регистров и преобразований BMP180."""
+
+    def __init__(self, temperature=25.0, pressure=101325.0, temp_noise: float = 0.0, press_noise: float = 0.0,
+                 calibration=DATASHEET_CALIBRATION, timing: bool = True, seed: int | None = None):
+        """temperature - температура в °C: число или функция времени в секундах от создания модели;
+        pressure - давление в Па: число или функция времени;
+        temp_noise - СКО шума температуры, °C;
+        press_noise - СКО шума давления, Па. Число или последовательность по индексу OSS
+            (например, bmp180_adaptive.NOISE_PA);
+        calibration - 11 калибровочных коэффициентов AC1..MD;
+        timing - если Истина, то результат готов через время преобразования из документации,
+            иначе сразу после запуска преобразования (для измерения затрат самого драйвера);
+        seed - начальное значение генератора случайных чисел."""
+        if len(calibration) != 11:
+            raise ValueError(f"Invalid calibration length: {len(calibration)}")
+        self.temperature = temperature
+        self.pressure = pressure
+        self.temp_noise = temp_noise
+        self.press_noise = press_noise
+        self.timing = timing
+        if seed is not None:
+            random.seed(seed)
+        self._cfa = tuple(calibration)
+        pre = _precalc(self._cfa)
+        self._plans = tuple(_build_plan(self._cfa, pre, oss) for oss in range(4))
+        self._regs = bytearray(0x100)
+        for i, val in enumerate(self._cfa):
+            self._regs[_REG_CALIB + 2 * i] = (val >> 8) & 0xFF
+            self._regs[_REG_CALIB + 2 * i + 1] = val & 0xFF
+        self._regs[_REG_ID] = _CHIP_ID
+        self._elapsed_us = 0                # время от создания модели, мкс
+        self._ticks = time.ticks_us()
+        self._ready_us = 0                  # момент окончания текущего преобразования, мкс
+        self._result = 0                    # значение OUT_MSB..OUT_XLSB по окончании преобразования
+        self.conversions = 0                # кол-во запущенных преобразований
+        # последние результаты обращения компенсации: постоянные значения не пересчитываются
+        self._memo_t = None, 0
+        self._memo_p = None, 0
+
+    @staticmethod
+    def _value(source, t: float) -> float:
+        return source(t) if callable(source) else source
+
+    def _now(self) -> int:
+        """Обновляет и возвращает время от создания модели, мкс."""
+        now = time.ticks_us()
+        self._elapsed_us += time.ticks_diff(now, self._ticks)
+        self._ticks = now
+        return self._elapsed_us
+
+    def raw_temperature(self, t: float) -> int:
+        """Сырое значение температуры UT в момент времени t, секунд."""
+        temp = self._value(self.temperature, t)
+        if self.temp_noise:
+            temp += self.temp_noise * _gauss()
+        return self._ut(temp)
+
+    def _ut(self, temp: float) -> int:
+        if temp != self._memo_t[0]:
+            plan = self._plans[0]
+            self._memo_t = temp, _bisect(lambda ut: _comp_temp_float(plan, ut)[0], temp, 0xFFFF)
+        return self._memo_t[1]
+
+    def raw_pressure(self, t: float, oss: int) -> int:
+        """Сырое значение давления UP для OSS в момент времени t, секунд."""
+        press = self._value(self.pressure, t)
+        noise = self.press_noise
+        if not isinstance(noise, (int, float)):
+            noise = noise[oss]
+        if noise:
+            press += noise * _gauss()
+        # преобразование давления компенсируется по температуре без шума
+        ut = self._ut(self._value(self.temperature, t))
+        key = press, ut, oss
+        if key != self._memo_p[0]:
+            plan = self._plans[oss]
+            b5 = _comp_temp_float(plan, ut)[1]
+            self._memo_p = key, _bisect(lambda up: _comp_press_float(plan, up, b5), press, (1 << (16 + oss)) - 1)
+        return self._memo_p[1]
+
+    def _start(self, ctrl: int):
+        """Запуск преобразования записью в регистр CTRL_MEAS."""
+        oss = ctrl >> 6
+        t_us = self._now()
+        if ctrl & 0x1F == 0x0E:     # температура
+            self._result = self.raw_temperature(t_us / 1_000_000) << 8
+            conv_us = CONV_TIME_TEMP_US
+        else:                       # давление
+            self._result = self.raw_pressure(t_us / 1_000_000, oss) << (8 - oss)
+            conv_us = CONV_TIME_PRESS_US[oss]
+        self._ready_us = t_us + conv_us if self.timing else t_us
+        self.conversions += 1
+
+    def _update(self):
+        """Окончание преобразования: результат в OUT_MSB..OUT_XLSB, сброс бита SCO."""
+        regs = self._regs
+        if regs[_REG_CTRL] & _MSK_BIT_SCO and self._now() >= self._ready_us:
+            result = self._result
+            regs[_REG_OUT_MSB] = (result >> 16) & 0xFF
+            regs[_REG_OUT_MSB + 1] = (result >> 8) & 0xFF
+            regs[_REG_OUT_MSB + 2] = result & 0xFF
+            regs[_REG_CTRL] &= ~_MSK_BIT_SCO
+
+    def read_mem(self, reg_addr: int, buf):
+        """Чтение регистров, начиная с reg_addr, в буфер buf."""
+        self._update()
+        regs = self._regs
+        for i in range(len(buf)):
+            buf[i] = regs[(reg_addr + i) & 0xFF]
+
+    def write_mem(self, reg_addr: int, buf):
+        """Запись регистров, начиная с reg_addr. Доступны для записи только CTRL_MEAS и SOFT_RESET."""
+        self._update()
+        for i in range(len(buf)):
+            reg, val = (reg_addr + i) & 0xFF, buf[i]
+            if reg == _REG_CTRL:
+                self._regs[_REG_CTRL] = val
+                if val & _MSK_BIT_SCO:
+                    self._start(val)
+            elif reg == _REG_SOFT_RESET and val == 0xB6:
+                self._regs[_REG_CTRL] = 0
+
+
+class SimBusAdapter(BusAdapter):
+    """Адаптер шины, к которой подключена модель BMP180 (Bmp180Model). Счетчики transactions, bytes_read,
+    bytes_written позволяют оценить загрузку шины драйвером. Обмены выполняются под блокировкой шины (lock),
+    как у адаптеров реальных шин."""
+
+    def __init__(self, model: Bmp180Model | None = None, address: int = 0x77):
+        """model - модель датчика, None - модель с параметрами по умолчанию;
+        address - адрес датчика на шине. Обращение по другому адресу вызывает OSError (ENODEV)."""
+        super().__init__(model if model is not None else Bmp180Model())
+        self.address = address
+        self._ptr = 0           # указатель регистра для read/write без адреса регистра
+        self.reset_counters()
+
+    def reset_counters(self):
+        """Обнуляет счетчики обмена по шине."""
+        self.transactions = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def _check(self, device_addr: int, n_read: int, n_written: int):
+        if device_addr != self.address:
+            raise OSError(_ENODEV)
+        self.transactions += 1
+        self.bytes_read += n_read
+        self.bytes_written += n_written
+
+    def read_register(self, device_addr: int, reg_addr: int, bytes_count: int) -> bytes:
+        buf = bytearray(bytes_count)
+        with self.lock:
+            self._check(device_addr, bytes_count, 1)
+            self.bus.read_mem(reg_addr, buf)
+        return bytes(buf)
+
+    def write_register(self, device_addr: int, reg_addr: int, value: int | bytes | bytearray | memoryview,
+                       bytes_count: int, byte_order: str):
+        if isinstance(value, int) and bytes_count > self.pool.size:
+            value = value.to_bytes(bytes_count, byte_order)
+        if not isinstance(value, int):
+            self.write_buf_to_memory(device_addr, reg_addr, value)
+            return
+        pool = self.pool
+        views = pool.get()
+        try:
+            self.write_buf_to_memory(device_addr, reg_addr, to_buf(value, views[bytes_count], byte_order))
+        finally:
+            pool.put(views)
+
+    def read(self, device_addr: int, n_bytes: int) -> bytes:
+        return bytes(self.read_to_buf(device_addr, bytearray(n_bytes)))
+
+    def read_to_buf(self, device_addr: int, buf: bytearray | memoryview) -> bytes:
+        with self.lock:
+            self._check(device_addr, len(buf), 0)
+            self.bus.read_mem(self._ptr, buf)
+        return buf
+
+    def write(self, device_addr: int, buf: bytes | bytearray | memoryview):
+        """Первый байт - адрес регистра, остальные - записываемые в регистры значения."""
+        with self.lock:
+            self._check(device_addr, 0, len(buf))
+            if len(buf):
+                self._ptr = buf[0]
+                self.bus.write_mem(buf[0], memoryview(buf)[1:])
+
+    def read_buf_from_memory(self, device_addr: int, mem_addr, buf: bytearray | memoryview, address_size: int = 1):
+        with self.lock:
+            self._check(device_addr, len(buf), 1)
+            self.bus.read_mem(mem_addr, buf)
+        return buf
+
+    def write_buf_to_memory(self, device_addr: int, mem_addr, buf: bytes | bytearray | memoryview):
+        with self.lock:
+            self._check(device_addr, 0, 1 + len(buf))
+            self.bus.write_mem(mem_addr, buf)
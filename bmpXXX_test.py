@@ -0,0 +1,698 @@
+# micropython
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Тесты драйвера Bmp180 и sensor_pack_2 на модели датчика (bmp180_sim), без оборудования.
+
+Запуск:
+    CPython:                     python3 -m pytest -q bmpXXX_test.py   или   python3 bmpXXX_test.py
+    MicroPython (unix порт):     MICROPYPATH=host:.frozen:. micropython bmpXXX_test.py"""
+import sys
+
+try:
+    import micropython  # noqa: F401
+except ImportError:     # CPython: заглушки модулей MicroPython (machine, micropython) из каталога host
+    import os
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "host"))
+
+import gc
+import os
+import random
+import time
+
+import bmp180
+from bmp180 import Bmp180, _build_plan, _precalc, _comp_temp_int, _comp_press_int
+from bmp180_sim import DATASHEET_CALIBRATION, Bmp180Model, SimBusAdapter
+from sensor_pack_2.ring_buffer import SampleRing
+from machine import Pin
+
+# размер выделенной памяти кучи есть только в MicroPython, в CPython - tracemalloc
+_mem_alloc = getattr(gc, "mem_alloc", None)
+
+
+class _Clock:
+    """Виртуальное время драйвера: подменяет модуль time в bmp180 (with _Clock(): ...).
+    Паузы не выполняются, а только продвигают время, поэтому ожидание преобразований не тормозит тесты."""
+
+    def __init__(self):
+        self.us = 0
+
+    def ticks_us(self) -> int:
+        return self.us & 0x3FFF_FFFF
+
+    def ticks_ms(self) -> int:
+        return (self.us // 1000) & 0x3FFF_FFFF
+
+    def ticks_diff(self, a: int, b: int) -> int:
+        return time.ticks_diff(a, b)
+
+    def ticks_add(self, a: int, b: int) -> int:
+        return time.ticks_add(a, b)
+
+    def sleep_us(self, us: int):
+        self.us += us
+
+    def sleep_ms(self, ms: int):
+        self.us += 1000 * ms
+
+    def __enter__(self):
+        self._saved, bmp180.time = bmp180.time, self
+        return self
+
+    def __exit__(self, *args):
+        bmp180.time = self._saved
+
+
+# ---------------------------------------------------------------- целочисленная компенсация
+
+def _c_div(a: int, b: int) -> int:
+    """Оператор / языка C для целых со знаком: отбрасывание дробной части."""
+    q = abs(a) // abs(b)
+    return -q if (a < 0) != (b < 0) else q
+
+
+def _c_reference(cal, ut: int, up: int, oss: int) -> tuple:
+    """Алгоритм из документации (datasheet) в семантике C: long - 32 бита со знаком, деление к нулю,
+    сдвиг вправо арифметический, B4 и B7 - unsigned long. Возвращает (T в 0.1 °C, B5, P в Па)."""
+    ac1, ac2, ac3, ac4, ac5, ac6, b1, b2, _, mc, md = cal
+    x1 = ((ut - ac6) * ac5) >> 15
+    x2 = _c_div(mc << 11, x1 + md)
+    b5 = x1 + x2
+    t = (b5 + 8) >> 4
+    b6 = b5 - 4000
+    x1 = (b2 * ((b6 * b6) >> 12)) >> 11
+    x2 = (ac2 * b6) >> 11
+    x3 = x1 + x2
+    b3 = _c_div(((ac1 * 4 + x3) << oss) + 2, 4)
+    x1 = (ac3 * b6) >> 13
+    x2 = (b1 * ((b6 * b6) >> 12)) >> 16
+    x3 = (x1 + x2 + 2) >> 2
+    b4 = (ac4 * ((x3 + 32768) & 0xFFFF_FFFF)) >> 15
+    b7 = (((up - b3) & 0xFFFF_FFFF) * (50000 >> oss)) & 0xFFFF_FFFF
+    if b7 < 0x8000_0000:
+        p = (b7 * 2) // b4
+    else:
+        p = (b7 // b4) * 2
+    x1 = (p >> 8) * (p >> 8)
+    x1 = (x1 * 3038) >> 16
+    x2 = (-7357 * p) >> 16
+    return t, b5, p + ((x1 + x2 + 3791) >> 4)
+
+
+def _plans(cal) -> tuple:
+    pre = _precalc(cal)
+    return tuple(_build_plan(cal, pre, oss) for oss in range(4))
+
+
+def test_int_math_datasheet_vector():
+    plan = _plans(DATASHEET_CALIBRATION)[0]
+    t, b5 = _comp_temp_int(plan, 27898)
+    assert 150 == t
+    assert 69964 == _comp_press_int(plan, 23843, b5)
+
+
+def test_int_math_matches_c_reference():
+    cal = DATASHEET_CALIBRATION
+    plans = _plans(cal)
+    random.seed(180)
+    for _ in range(20000):
+        oss = random.randint(0, 3)
+        ut = random.randint(24000, 35000)
+        up = random.randint(15000, 45000) << oss
+        t, b5 = _comp_temp_int(plans[oss], ut)
+        res = t, b5, _comp_press_int(plans[oss], up, b5)
+        assert _c_reference(cal, ut, up, oss) == res, (ut, up, oss, res)
+
+
+# ---------------------------------------------------------------- кэш калибровки
+
+_CACHE = "bmpXXX_test.cal"
+
+
+def _remove(name: str):
+    try:
+        os.remove(name)
+    except OSError:
+        pass
+
+
+def test_calibration_cache():
+    bus = SimBusAdapter(Bmp180Model(timing=False))
+    _remove(_CACHE)
+    try:
+        ref = Bmp180(bus, cache_file=_CACHE)    # первый запуск: EEPROM, затем запись кэша
+        bus.reset_counters()
+        ps = Bmp180(bus, cache_file=_CACHE)     # "пробуждение": контрольное чтение MC, MD
+        assert 1 == bus.transactions and 4 == bus.bytes_read
+        assert list(ref._cfa) == list(ps._cfa) and tuple(ref._pre) == tuple(ps._pre)
+        with _Clock():
+            assert next(ref)[:2] == next(ps)[:2]
+        # другой датчик (MC не совпал): кэш недействителен, калибровка из EEPROM, кэш создается заново
+        bus = SimBusAdapter(Bmp180Model(calibration=DATASHEET_CALIBRATION[:9] + (-8710, 2868), timing=False))
+        assert -8710 == Bmp180(bus, cache_file=_CACHE).get_calibration(9)
+        bus.reset_counters()
+        Bmp180(bus, cache_file=_CACHE)
+        assert 1 == bus.transactions
+        with open(_CACHE, "r+b") as f:          # поврежденный файл
+            f.seek(20)
+            f.write(b"\xff")
+        bus.reset_counters()
+        assert -8710 == Bmp180(bus, cache_file=_CACHE).get_calibration(9)
+        assert bus.transactions > 1
+    finally:
+        _remove(_CACHE)
+
+
+def test_calibration_cache_fs_error():
+    bus = SimBusAdapter(Bmp180Model(timing=False))
+    name = "no_such_dir/bmp180.cal"             # запись и удаление завершаются OSError
+    Bmp180(bus, cache_file=name)
+    bus.reset_counters()
+    ps = Bmp180(bus, cache_file=name)
+    assert bus.transactions > 1                 # кэша нет: калибровка из EEPROM
+    with _Clock():
+        assert 90_000 < next(ps).pressure < 110_000
+
+
+# ---------------------------------------------------------------- итератор
+
+def test_measurements_timestamp_and_disabled_channels():
+    from bmp180 import TimedParams
+    from sensor_pack_2.bmp_common import MeasuredParams
+    assert ("temperature", "pressure") == MeasuredParams._fields    # общий тип пакета не изменен
+    ps = Bmp180(SimBusAdapter(Bmp180Model(timing=False)))
+    with _Clock() as clock:
+        clock.us = 5_000_000
+        mps = list(ps.measurements(3))
+        assert 3 == len(mps)
+        for mp in mps:
+            assert isinstance(mp, TimedParams) and 5000 <= mp.timestamp
+        ps.set_channels(temp_en=False, press_en=False)
+        assert [] == list(ps.measurements(3))   # не RuntimeError: generator raised StopIteration
+        assert [] == list(ps.measurements())
+
+
+def test_log_records_oss_in_use():
+    try:
+        import numpy    # noqa: F401  LogReader - для компьютера (CPython + NumPy)
+    except ImportError:
+        return
+    from bmp180_log import LogReader, LogWriter
+    name = "bmpXXX_test.b18"
+    ps = Bmp180(SimBusAdapter(Bmp180Model(timing=False)), oss=3)
+    ref = []
+    try:
+        with open(name, "wb") as f:
+            log = LogWriter(f, ps)                      # OSS в заголовке - 3
+            with _Clock():
+                for oss in 3, 0, 1, 2, 0, 3:            # OSS меняется между измерениями (AdaptiveOss)
+                    ps.set_oversampling(press=oss)
+                    mp = next(ps)
+                    assert oss == ps.get_raw()[2]
+                    log.append_from(ps, mp.timestamp)
+                    ref.append(mp.pressure)
+            log.close()
+        reader = LogReader(name)
+        try:
+            assert [3, 0, 1, 2, 0, 3] == [int(v) for v in reader.to_numpy()[3]]
+            for p, expected in zip(reader.compensate()[1], ref):
+                assert abs(p - expected) < 1E-6
+        finally:
+            reader.close()
+    finally:
+        _remove(name)
+
+
+# ---------------------------------------------------------------- память кучи
+
+def _heap_used() -> int:
+    """Занятая (живая) память кучи после сборки мусора, байт."""
+    gc.collect()
+    if _mem_alloc is not None:
+        return _mem_alloc()
+    import tracemalloc
+    return tracemalloc.get_traced_memory()[0]
+
+
+def _heap_growth(func, count: int) -> int:
+    """Прирост занятой памяти кучи после count вызовов func, байт (утечки, а не выделения)."""
+    tracing = False
+    if _mem_alloc is None:
+        import tracemalloc
+        tracing = not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+    try:
+        before = _heap_used()
+        for _ in range(count):
+            func()
+        return _heap_used() - before
+    finally:
+        if tracing:
+            tracemalloc.stop()
+
+
+def _allocated(func, count: int) -> int:
+    """MicroPython: память кучи, выделенная за count вызовов func, байт. Сборщик мусора отключен,
+    поэтому учитываются и временные объекты, а не только оставшиеся в живых."""
+    gc.collect()
+    gc.disable()
+    try:
+        before = _mem_alloc()
+        for _ in range(count):
+            func()
+        return _mem_alloc() - before
+    finally:
+        gc.enable()
+
+
+class _NoAllocBus(SimBusAdapter):
+    """Шина, на которой методы адаптера, возвращающие новый объект bytes, вызывают ошибку:
+    горячий путь должен читать только в заранее выделенные буферы (read_buf_from_memory, read_to_buf)."""
+
+    def read_register(self, device_addr: int, reg_addr: int, bytes_count: int) -> bytes:
+        raise AssertionError(f"read_register({reg_addr:#x}) in the hot path")
+
+    def read(self, device_addr: int, n_bytes: int) -> bytes:
+        raise AssertionError("read() in the hot path")
+
+
+def _sampler(int_math: bool):
+    """Возвращает (датчик, кольцевой буфер, функция получения одного измерения) на шине _NoAllocBus."""
+    ps = Bmp180(_NoAllocBus(Bmp180Model(timing=False)), int_math=int_math)
+    ps.set_channels(temp_en=True, press_en=True)
+    ps.set_temp_refresh(every_n=10)
+    ring = SampleRing(64)
+    clock = _Clock()
+
+    def sample():
+        while not ps.poll_into(ring):
+            clock.sleep_us(500)
+
+    return ps, ring, clock, sample
+
+
+def test_poll_into_no_allocation():
+    count = 10_000
+    ps, ring, clock, sample = _sampler(int_math=True)
+    with clock:
+        def raw():                      # запуск, чтение и целочисленная компенсация пары T/P
+            ps._start(True)
+            ps.get_temperature_int()
+            ps._start(False)
+            ps.get_pressure_int()
+
+        for _ in range(100):            # прогрев: кэши модели, буферы карты регистров
+            raw()
+        if _mem_alloc is not None:
+            assert 0 == _allocated(raw, count)
+        for _ in range(100):
+            sample()
+        if _mem_alloc is not None:
+            # результаты (температура и давление) - вещественные; в MicroPython они могут размещаться в куче
+            box = [0.0, 0.0]
+
+            def results():
+                box[0] = 0.1 * count
+                box[1] = float(count)
+
+            boxed = _allocated(results, count)
+            assert _allocated(sample, count) <= boxed
+        assert _heap_growth(sample, count) < 1024
+    assert ring.capacity == len(ring)
+
+
+def test_poll_into_float_no_heap_growth():
+    ps, ring, clock, sample = _sampler(int_math=False)
+    with clock:
+        for _ in range(100):
+            sample()
+        growth = _heap_growth(sample, 10_000)
+    # утечка хотя бы одного объекта на измерение дала бы прирост не менее 16 * count байт
+    assert growth < 1024, growth
+    assert ring.capacity == len(ring)
+
+
+# ---------------------------------------------------------------- вывод EOC
+
+_REG_CTRL_MEAS = 0xF4
+
+
+class _EocBus(SimBusAdapter):
+    """Модель BMP180 на шине, с выводом EOC: импульс на выводе eoc по окончании каждого преобразования
+    (модель без задержки преобразования). Считает чтения регистра CTRL_MEAS (опрос бита SCO)."""
+
+    def __init__(self, eoc: Pin | None = None):
+        super().__init__(Bmp180Model(timing=False))
+        self.eoc = eoc
+        self.ctrl_reads = 0
+
+    def read_buf_from_memory(self, device_addr: int, mem_addr, buf, address_size: int = 1):
+        if _REG_CTRL_MEAS == mem_addr:
+            self.ctrl_reads += 1
+        return super().read_buf_from_memory(device_addr, mem_addr, buf, address_size)
+
+    def write_buf_to_memory(self, device_addr: int, mem_addr, buf):
+        super().write_buf_to_memory(device_addr, mem_addr, buf)
+        if self.eoc is not None and _REG_CTRL_MEAS == mem_addr and buf[0] & 0x20:
+            self.eoc.value(0)
+            self.eoc.value(1)   # фронт EOC: преобразование завершено
+
+
+class _Scheduler:
+    """Подменяет модуль micropython в bmp180: функции, переданные в schedule, ставятся в очередь
+    и выполняются методом run, как при выходе из прерывания."""
+
+    def __init__(self):
+        self.queue = []
+
+    def schedule(self, func, arg) -> bool:
+        self.queue.append((func, arg))
+        return True
+
+    def run(self):
+        queue, self.queue = self.queue, []
+        for func, arg in queue:
+            func(arg)
+
+    def __enter__(self):
+        self._saved, bmp180.micropython = bmp180.micropython, self
+        return self
+
+    def __exit__(self, *args):
+        bmp180.micropython = self._saved
+
+
+def test_eoc_pin_no_status_reads():
+    eoc = Pin(0, Pin.IN)
+    bus = _EocBus(eoc)
+    ps = Bmp180(bus, eoc_pin=eoc)
+    ps.set_channels(temp_en=True, press_en=True)
+    ps.set_temp_refresh(every_n=5)
+    with _Clock():
+        for _ in range(20):
+            mp = next(ps)
+            assert 90_000 < mp.pressure < 110_000
+    assert 0 == bus.ctrl_reads
+
+
+def test_eoc_pin_start_wait_read():
+    eoc = Pin(0, Pin.IN)
+    bus = _EocBus(eoc)
+    ps = Bmp180(bus, eoc_pin=eoc)
+    with _Clock():
+        next(ps)                        # флаг EOC установлен окончанием последнего преобразования
+        bus.eoc = None                  # следующее преобразование "идет", импульса EOC пока нет
+        ps.start_measurement()
+        assert ps.remaining_ms() > 0    # флаг предыдущего преобразования сброшен
+        assert not ps.is_data_ready()
+        eoc.value(0)
+        eoc.value(1)                    # прерывание: преобразование завершено
+        assert ps.is_data_ready() and ps.get_data_status(raw=False)
+        assert 0 == ps.remaining_ms()
+        assert 90_000 < ps.get_pressure() < 110_000
+    assert 0 == bus.ctrl_reads          # готовность - только по выводу EOC
+
+
+def test_eoc_callback_scheduled():
+    eoc = Pin(0, Pin.IN)
+    bus = _EocBus(eoc)
+    ps = Bmp180(bus, eoc_pin=eoc)
+    ps.set_channels(temp_en=True, press_en=True)
+    results = []
+    with _Scheduler() as sched:
+        ps.set_eoc_callback(results.append)
+        assert ps.poll() is None        # запуск измерения температуры, EOC - в "прерывании"
+        assert 1 == len(sched.queue)    # вызов отложен через micropython.schedule
+        assert not results
+        for _ in range(4):              # температура, затем давление
+            sched.run()
+            if results:
+                break
+    assert 1 == len(results)
+    assert 90_000 < results[0].pressure < 110_000
+    assert 0 == bus.ctrl_reads
+
+
+def test_polling_without_eoc_pin():
+    bus = _EocBus()
+    ps = Bmp180(bus)
+    with _Clock():
+        mp = next(ps)
+    assert 90_000 < mp.pressure < 110_000
+    assert bus.ctrl_reads > 0       # готовность определяется опросом бита SCO
+    try:
+        ps.set_eoc_callback(print)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("set_eoc_callback without eoc_pin")
+
+
+# ---------------------------------------------------------------- блокировка шины
+
+def test_transaction_blocks_other_thread():
+    import _thread
+    bus = SimBusAdapter(Bmp180Model(timing=False))
+    ps = Bmp180(bus)
+    log = []
+
+    def other():
+        ps.start_measurement()      # одиночный обмен, без транзакции
+        log.append("other")
+
+    with bus.transaction():
+        transactions = bus.transactions
+        _thread.start_new_thread(other, ())
+        time.sleep_ms(50)
+        assert transactions == bus.transactions    # обмен другого потока ожидает освобождения шины
+        log.append("owner")
+    for _ in range(200):
+        if 2 == len(log):
+            break
+        time.sleep_ms(5)
+    assert ["owner", "other"] == log
+    assert transactions + 1 == bus.transactions
+
+
+def test_async_bus_lock_shared():
+    try:
+        import asyncio
+    except ImportError:
+        import uasyncio as asyncio
+    from bmp180_async import Bmp180Async, get_bus_lock
+    from sensor_pack_2.bus_stats import InstrumentedAdapter
+    bus = SimBusAdapter(Bmp180Model(timing=False))
+    lock = get_bus_lock(bus)
+    assert lock is get_bus_lock(InstrumentedAdapter(bus))    # одна блокировка на шину
+    assert lock.bus_lock is bus.lock
+    sensors = Bmp180Async(Bmp180(bus)), Bmp180Async(Bmp180(bus))
+
+    async def main():
+        return await asyncio.gather(*(sensor.read() for sensor in sensors))
+
+    for mp in asyncio.run(main()):
+        assert 90_000 < mp.pressure < 110_000
+    assert not bus.lock.locked()
+
+
+def test_scheduler_report_keeps_one_shot():
+    from sensor_pack_2.bus_scheduler import BusScheduler
+    sched = BusScheduler(SimBusAdapter(Bmp180Model(timing=False)))
+    calls = []
+    sched.add(lambda: calls.append("periodic"), period_ms=1000, name="periodic")
+    sched.submit(lambda: calls.append("once"), name="once")
+    sched.submit(lambda: calls.append("anon"))
+    sched.submit(lambda: calls.append("anon"))
+    while sched.run_once():
+        pass
+    assert ["anon", "anon", "once", "periodic"] == sorted(calls)
+    requests = sched.get_report()["requests"]
+    assert 1 == requests["once"][0]         # выполненный однократный запрос остается в отчете
+    assert 2 == requests[None][0]           # запросы без имени учитываются вместе
+    assert 1 == requests["periodic"][0]
+    sched.submit(lambda: None, name="once")
+    assert 1 == sched.get_report()["requests"]["once"][0]
+    sched.reset_report()
+    assert {"periodic": (0, 0, 0), "once": (0, 0, 0)} == sched.get_report()["requests"]
+
+
+# ---------------------------------------------------------------- групповое измерение
+
+def test_mux_bus_disables_other_muxes():
+    from bmp180_group import mux_selector
+    from sensor_pack_2.bus_service import BusAdapter
+
+    class Bus(BusAdapter):
+        def __init__(self):
+            super().__init__(None)
+            self.log = []
+
+        def write(self, device_addr: int, buf):
+            self.log.append((device_addr, buf[0]))
+
+    bus = Bus()
+    sel_a, sel_b = mux_selector(bus, 0x70, 1), mux_selector(bus, 0x71, 2)
+    sel_a()
+    assert [(0x71, 0), (0x70, 0b10)] == bus.log     # состояние 0x71 неизвестно: отключается
+    del bus.log[:]
+    sel_a()
+    assert not bus.log                              # повторный выбор без обмена
+    sel_b()
+    assert [(0x70, 0), (0x71, 0b100)] == bus.log    # на шине отвечает только датчик канала 2 у 0x71
+
+
+def test_group_sensor_error_keeps_others():
+    from bmp180_group import Bmp180Group
+    buses = [SimBusAdapter(Bmp180Model(timing=False)) for _ in range(3)]
+    group = Bmp180Group([Bmp180(bus) for bus in buses])
+    buses[1].address = 0x76         # датчик перестал отвечать: OSError (ENODEV)
+    results = group.acquire()
+    assert results[1] is None and 0 == group.get_latency_us()[1]
+    for i in 0, 2:
+        assert 90_000 < results[i].pressure < 110_000
+        assert group.get_latency_us()[i] > 0
+
+
+# ---------------------------------------------------------------- sensor_pack_2
+
+def test_device_unpack_byte_orders():
+    from sensor_pack_2.base_sensor import Device
+    dev = Device(SimBusAdapter(Bmp180Model(timing=False)), 0x77, True)
+    buf = b"\x01\x02"
+    assert (0x0102,) == dev.unpack("H", buf)
+    for bo, val in (">", 0x0102), ("<", 0x0201), ("!", 0x0102):
+        assert (val,) == dev.unpack("H", buf, bo)
+    for bo in "=", "@":     # собственный порядок байт платформы
+        assert (int.from_bytes(buf, sys.byteorder),) == dev.unpack("H", buf, bo)
+
+
+# ---------------------------------------------------------------- адаптер SPI
+
+class _BoschSpi:
+    """Шина SPI с устройством Bosch: первый байт после выбора устройства - адрес регистра, бит 7 - признак
+    чтения; далее данные, с автоинкрементом адреса. write_readinto - петля (loopback)."""
+
+    def __init__(self):
+        self.mem = bytearray(256)
+        self.cs = None
+        self.fail = False
+        self._ptr = None
+
+    def select(self):
+        """Фронт CS: начало новой посылки."""
+        self._ptr = None
+
+    def write(self, buf):
+        assert 0 == self.cs.value(), "CS not asserted"
+        buf = bytes(buf)
+        if self._ptr is None:
+            self._reading, self._ptr = bool(buf[0] & 0x80), buf[0] & 0x7F
+            buf = buf[1:]
+        assert not (buf and self._reading), "data written in read mode"
+        for b in buf:
+            self.mem[self._ptr] = b
+            self._ptr += 1
+
+    def readinto(self, buf, write: int = 0x00):
+        assert 0 == self.cs.value() and self._reading, "read without read bit"
+        if self.fail:
+            raise OSError(5)    # EIO
+        for i in range(len(buf)):
+            buf[i] = self.mem[self._ptr]
+            self._ptr += 1
+
+    def write_readinto(self, wr_buf, rd_buf):
+        assert 0 == self.cs.value()
+        rd_buf[:] = wr_buf
+
+
+class _ChipSelect(Pin):
+    def __init__(self, bus: _BoschSpi):
+        super().__init__(5, Pin.OUT, value=1)
+        self.bus = bus
+        bus.cs = self
+
+    def value(self, x=None):
+        if x is not None:
+            self.bus.select()
+        return super().value(x)
+
+
+def _spi():
+    from sensor_pack_2.bus_service import SpiAdapter
+    bus = _BoschSpi()
+    cs = _ChipSelect(bus)
+    adapter = SpiAdapter(bus)
+    adapter.prepare_func = lambda buf, i: buf.__setitem__(i, buf[i] & 0x7F)
+    adapter.prepare_read_func = lambda buf, i: buf.__setitem__(i, buf[i] | 0x80)
+    return bus, cs, adapter
+
+
+def test_spi_adapter_payloads():
+    from sensor_pack_2.base_sensor import DeviceEx
+    bus, cs, adapter = _spi()
+    free = adapter.pool.free()
+    bus.mem[0x50:0x53] = b"\x01\x02\x03"
+    assert b"\x01\x02\x03" == bytes(adapter.read_register(cs, 0x50, 3))    # бит чтения - prepare_read_func
+    buf = bytearray(2)
+    assert buf is adapter.read_buf_from_memory(cs, 0xD1, buf)             # prepare_func не применяется
+    assert b"\x02\x03" == bytes(buf)
+    adapter.write_register(cs, 0xF4, 0x2E, 1, "big")                      # prepare_func сбрасывает бит 7
+    assert 0x2E == bus.mem[0x74]
+    adapter.write_buf_to_memory(cs, 0xF5, b"\x11\x22")
+    assert b"\x11\x22" == bytes(bus.mem[0x75:0x77])
+    assert 0x1122 == DeviceEx(adapter, cs, True).read_reg_16(0x75)
+    rx = bytearray(3)
+    adapter.write_and_read(cs, b"abc", rx)
+    assert b"abc" == bytes(rx)
+    assert 1 == cs.value()
+    assert free == adapter.pool.free()
+    assert not adapter.lock.locked()
+
+
+def test_spi_adapter_error_releases_cs():
+    bus, cs, adapter = _spi()
+    free = adapter.pool.free()
+    bus.fail = True
+    try:
+        adapter.read_buf_from_memory(cs, 0x50, bytearray(2))
+    except OSError:
+        pass
+    else:
+        raise AssertionError("OSError expected")
+    assert 1 == cs.value()                  # устройство не осталось выбранным
+    assert free == adapter.pool.free()      # буфер команды возвращен в пул
+    assert not adapter.lock.locked()
+
+
+
+def test_filters_skip_non_finite():
+    from sensor_pack_2.filters import (MedianFilter, MovingAverage, EmaFilter, AlphaBetaFilter,
+                                       KalmanFilter, FilterChain)
+    nan = float("nan")
+    med = MedianFilter(3)
+    out = [med.update(v) for v in (1.0, nan, 2.0, 3.0, 4.0)]    # NaN прошел бы через окно
+    assert [1.0, 1.0, 1.5, 2.0, 3.0] == out
+    for flt in (MovingAverage(3), EmaFilter(0.5), AlphaBetaFilter(0.5, 0.1), KalmanFilter(1.0, 0.1),
+                FilterChain(MedianFilter(3), EmaFilter(0.5))):
+        assert flt.update(None) is None                     # пустой фильтр
+        first = flt.update(10.0)
+        for bad in (nan, float("inf"), None):
+            assert first == flt.update(bad)                 # состояние не изменилось
+        assert first == flt.value
+
+
+def test_filter_chain_passes_dt():
+    from sensor_pack_2.filters import AlphaBetaFilter, EmaFilter, FilterChain
+    ab = AlphaBetaFilter(1.0, 1.0)
+    chain = FilterChain(EmaFilter(1.0), ab)
+    for i in range(5):
+        chain.update(100.0 + 2.0 * i, 0.5)     # 2 ед. за 0.5 с
+    assert abs(ab.rate - 4.0) < 1e-3          # ед./с, а не ед./отсчет
+
+
+if __name__ == "__main__":
+    _tests = [(name, func) for name, func in globals().items() if name.startswith("test_")]
+    for _name, _func in sorted(_tests):
+        _func()
+        print("ok", _name)
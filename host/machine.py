@@ -0,0 +1,111 @@
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Заглушка модуля machine для запуска драйвера без изменений под CPython (на компьютере).
+Аппаратных шин нет: обмен через I2C/SPI вызывает OSError. Для работы без датчика используйте
+bmp180_sim.SimBusAdapter вместо I2cAdapter."""
+import micropython  # noqa: F401  добавляет в модуль time функции ticks_*, sleep_ms, sleep_us
+
+_ENODEV = 19
+
+
+class Pin:
+    """Вывод MCU. Состояние хранится в памяти; обработчик прерывания вызывается при изменении
+    состояния методом value() с подходящим фронтом."""
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode: int = -1, pull: int = -1, value: int | None = None):
+        self._id = id
+        self._value = 0 if value is None else int(bool(value))
+        self._handler = None
+        self._trigger = 0
+
+    def value(self, x=None):
+        if x is None:
+            return self._value
+        old, self._value = self._value, int(bool(x))
+        if self._handler is not None and old != self._value:
+            if (self._value and self._trigger & Pin.IRQ_RISING) or (not self._value and self._trigger & Pin.IRQ_FALLING):
+                self._handler(self)
+
+    def __call__(self, x=None):
+        return self.value(x)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def irq(self, handler=None, trigger: int = IRQ_FALLING | IRQ_RISING):
+        self._handler = handler
+        self._trigger = trigger
+
+    def __repr__(self):
+        return f"Pin({self._id})"
+
+
+class _NoBus:
+    """Шина без подключенных устройств."""
+
+    def __init__(self, id=0, *args, **kwargs):
+        self._id = id
+
+    def _no_device(self, *args, **kwargs):
+        raise OSError(_ENODEV, "no hardware bus on host")
+
+    def scan(self) -> list:
+        return []
+
+
+class I2C(_NoBus):
+    readfrom = readfrom_into = writeto = _NoBus._no_device
+    readfrom_mem = readfrom_mem_into = writeto_mem = _NoBus._no_device
+
+
+class SPI(_NoBus):
+    MSB = 0
+    LSB = 1
+    read = readinto = write = write_readinto = _NoBus._no_device
+
+
+class Timer:
+    """Программный таймер на потоке (threading.Timer)."""
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self._timer = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode: int = PERIODIC, period: int = -1, freq: float = -1, callback=None):
+        self.deinit()
+        self._period_s = 1 / freq if freq > 0 else period / 1000
+        self._mode = mode
+        self._callback = callback
+        self._arm()
+
+    def _arm(self):
+        import threading
+        self._timer = threading.Timer(self._period_s, self._fire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _fire(self):
+        if self._timer is None:
+            return
+        if self._mode == Timer.PERIODIC:
+            self._arm()
+        if self._callback is not None:
+            self._callback(self)
+
+    def deinit(self):
+        timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
@@ -0,0 +1,86 @@
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Заглушка модуля micropython для запуска драйвера без изменений под CPython (на компьютере).
+Добавьте каталог host в начало пути поиска модулей: PYTHONPATH=host python3 ...
+
+Также добавляет в модуль time функции MicroPython: ticks_ms, ticks_us, ticks_cpu, ticks_add, ticks_diff,
+sleep_ms, sleep_us. Значения ticks_* переполняются, как в MicroPython (период 2**30)."""
+import time
+
+_TICKS_PERIOD = 1 << 30
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALF = _TICKS_PERIOD // 2
+
+
+def const(expr):
+    return expr
+
+
+def native(func):
+    return func
+
+
+def viper(func):
+    return func
+
+
+def schedule(func, arg):
+    """Под CPython функция вызывается сразу."""
+    func(arg)
+    return True
+
+
+def alloc_emergency_exception_buf(size: int):
+    pass
+
+
+def heap_lock():
+    return 0
+
+
+def heap_unlock():
+    return 0
+
+
+def mem_info(*args):
+    pass
+
+
+def _ticks_ms() -> int:
+    return (time.monotonic_ns() // 1_000_000) & _TICKS_MAX
+
+
+def _ticks_us() -> int:
+    return (time.monotonic_ns() // 1_000) & _TICKS_MAX
+
+
+def _ticks_cpu() -> int:
+    return time.perf_counter_ns() & _TICKS_MAX
+
+
+def _ticks_add(ticks: int, delta: int) -> int:
+    return (ticks + delta) & _TICKS_MAX
+
+
+def _ticks_diff(ticks1: int, ticks2: int) -> int:
+    return ((ticks1 - ticks2 + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
+
+
+def _sleep_ms(ms: int):
+    if ms > 0:
+        time.sleep(ms / 1000)
+
+
+def _sleep_us(us: int):
+    if us > 0:
+        time.sleep(us / 1_000_000)
+
+
+if not hasattr(time, "ticks_ms"):
+    time.ticks_ms = _ticks_ms
+    time.ticks_us = _ticks_us
+    time.ticks_cpu = _ticks_cpu
+    time.ticks_add = _ticks_add
+    time.ticks_diff = _ticks_diff
+    time.sleep_ms = _sleep_ms
+    time.sleep_us = _sleep_us
@@ -7,6 +7,7 @@ import bmp180
 from machine import I2C, Pin
 from micropython import const
 from sensor_pack_2.bus_service import I2cAdapter
+from sensor_pack_2.filters import EmaFilter, MovingAverage, MedianFilter, FilterChain
 # from sensor_pack_2.bmp_common import MeasuredParams
 
 # преобразование и фильтрация давления
@@ -23,34 +24,6 @@ def pa_to_unit(value_pa: float, unit: str = 'hpa') -> float:
     return value_pa  # 'pa' или неизвестная единица
 
 
-def smooth_ema(new_val: float, prev_ema: float | None, alpha: float = 0.25) -> float:
-    """Экспоненциальное скользящее среднее (EMA).
-    alpha: 0.1..0.3 — плавное сглаживание, 0.4..0.6 — быстрый отклик."""
-    if prev_ema is None:
-        return new_val
-    # Ограничение alpha
-    if alpha < 0.0:
-        alpha = 0.0
-    elif alpha > 1.0:
-        alpha = 1.0
-    return alpha * new_val + (1.0 - alpha) * prev_ema
-
-
-def smooth_ma(window_vals: list, window: int = 4) -> float:
-    """Простое скользящее среднее по последним `window` значениям."""
-    if not window_vals:
-        return 0.0
-    # срез без создания лишнего списка, если в окне больше данных
-    if len(window_vals) <= window:
-        return sum(window_vals) / len(window_vals)
-    # суммирование последних `window` элементов
-    total, count = 0, 0
-    for i in range(len(window_vals) - window, len(window_vals)):
-        total += window_vals[i]
-        count += 1
-    return total / count
-
-
 def format_press(value_pa: float, unit: str = 'hpa', decimals: int = 2) -> str:
     """Форматирует давление для вывода: '1013.25 гПа'. Без словарей."""
     # Получаем конвертированное значение
@@ -72,7 +45,7 @@ def format_press(value_pa: float, unit: str = 'hpa', decimals: int = 2) -> str:
 
 # Для погодной станции (точность важнее скорости):
 USE_FILTER = not True
-FILTER_METHOD = 'ema'
+FILTER_METHOD = 'ema'  # 'ema', 'ma' или 'median+ema'
 EMA_ALPHA = 0.15    # очень плавная кривая
 MA_WINDOW = 4       # размер окна для MA. MA = Moving Average (простое скользящее среднее).
 
@@ -84,9 +57,15 @@ MA_WINDOW = 4       # размер окна для MA. MA = Moving Average (пр
 # Для отладки (видеть "сырые" данные):
 # USE_FILTER = False
 
-# --- состояние фильтра ---
-ema_state = None
-ema_history = []
+
+def make_filter():
+    """Создает фильтр давления по настройкам FILTER_METHOD, EMA_ALPHA, MA_WINDOW."""
+    if FILTER_METHOD == 'ma':
+        return MovingAverage(MA_WINDOW)
+    if FILTER_METHOD == 'median+ema':
+        return FilterChain(MedianFilter(3), EmaFilter(EMA_ALPHA))  # медиана подавляет одиночные выбросы
+    return EmaFilter(EMA_ALPHA)
+
 
 I2C_ID: int = const(1)
 SCL_PIN: int = const(7)
@@ -94,6 +73,7 @@ SDA_PIN: int = const(6)
 I2C_FREQ: int = const(400_000)
 SENSOR_ADDR: int = const(0x77)
 ITERATIONS: int = const(99)
+LOG_FILE = None     # например "press.b18": запись сырых измерений в двоичный журнал (нужен файл bmp180_log.py)
 
 if __name__ == '__main__':
     # пожалуйста установите выводы scl и sda в конструкторе для вашей платы, иначе ничего не заработает!
@@ -139,6 +119,7 @@ if __name__ == '__main__':
     print(20 * "*_")
     print("Reading pressure without using an iterator!")
     none_iters = 0
+    press_filter = make_filter()
     for index in range(ITERATIONS):
         ps.start_measurement()  # 1. Запуск аппаратного преобразования
         delay = ps.get_conversion_cycle_time()
@@ -153,15 +134,7 @@ if __name__ == '__main__':
 
         # фильтрация старт
         if USE_FILTER:
-            if FILTER_METHOD == 'ema':
-                press_filtered = smooth_ema(press, ema_state, EMA_ALPHA)
-                ema_state = press_filtered  # сохраняем состояние для следующего шага
-            else:  # 'ma'
-                ema_state = None
-                ema_history.append(press)
-                press_filtered = smooth_ma(ema_history, MA_WINDOW)
-                if len(ema_history) > max(MA_WINDOW * 2, 32):  # ограничиваем рост памяти
-                    ema_history.pop(0)
+            press_filtered = press_filter.update(press)
         # фильтрация стоп
 
         # Обновляем мин/макс по фильтрованному значению
@@ -175,3 +148,20 @@ if __name__ == '__main__':
         label = "->" if USE_FILTER else "|"
         print(f"Air pressure: {press:.1f} Pa {label} {press_filtered:.1f} Pa | {mmhg_filt:.3f} mmHg | min/max: {min_press:.1f}/{max_press:.1f} Pa")
 
+    print(20 * "*_")
+    print("Reading pressure and temperature using an iterator!")
+    ps.set_channels(temp_en=True, press_en=True)
+    ps.set_temp_refresh(every_n=10, every_ms=1000)  # температура (_B5) обновляется каждые 10 измерений давления или раз в секунду
+    log_file = log = None
+    if LOG_FILE:
+        from bmp180_log import LogWriter
+        log_file = open(LOG_FILE, "wb")
+        log = LogWriter(log_file, ps)
+    for mp in ps.measurements(ITERATIONS):
+        print(f"Air pressure: {mp.pressure:.1f} Pa | {pa_to_unit(mp.pressure, _unit):.3f} mmHg | Air temperature: {mp.temperature:.2f} \xB0 С | ticks: {mp.timestamp} [ms]")
+        if log:
+            log.append_from(ps, mp.timestamp)
+    if log:
+        log.close()
+        log_file.close()
+        print(f"{len(log)} records saved to {LOG_FILE}")
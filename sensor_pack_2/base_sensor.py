@@ -6,6 +6,9 @@ import micropython
 from sensor_pack_2 import bus_service
 from machine import Pin
 
+# struct.Struct есть в CPython, но отсутствует в MicroPython
+_Struct = getattr(struct, "Struct", None)
+
 @micropython.native
 def check_value(value: int | None,
                 valid_range: range | tuple,
@@ -111,6 +114,161 @@ def all_none(*args):
     return True
 
 
+class Codec:
+    """Предкомпилированный формат struct: аналог struct.Struct для MicroPython.
+    Формат и размер вычисляются один раз, при создании."""
+
+    def __init__(self, fmt: str):
+        self.format = fmt
+        self.size = struct.calcsize(fmt)
+
+    def pack(self, *values) -> bytes:
+        return struct.pack(self.format, *values)
+
+    def pack_into(self, buf, offset: int, *values):
+        struct.pack_into(self.format, buf, offset, *values)
+
+    def unpack(self, buf) -> tuple:
+        return struct.unpack(self.format, buf)
+
+    def unpack_from(self, buf, offset: int = 0) -> tuple:
+        return struct.unpack_from(self.format, buf, offset)
+
+
+def make_codec(fmt: str):
+    """Возвращает предкомпилированный формат: struct.Struct (CPython) или Codec (MicroPython)."""
+    if _Struct is not None:
+        return _Struct(fmt)
+    return Codec(fmt)
+
+
+class Reg:
+    """Описание регистра устройства: имя, адрес, разрядность в байтах (1..4), знаковость, порядок байт."""
+
+    def __init__(self, name: str, address: int, size: int = 1, signed: bool = False, big: bool = True):
+        if size not in range(1, 5):
+            raise ValueError(f"Invalid register size: {size}")
+        self.name = name
+        self.address = address
+        self.size = size
+        self.signed = signed
+        self.big = big
+        # символ формата struct. У трехбайтовых регистров его нет, они объединяются в блок как 3 байта.
+        ch = ('B', 'H', None, 'I')[size - 1]
+        self.fmt_char = ch.lower() if ch is not None and signed else ch
+
+    @micropython.native
+    def decode(self, buf) -> int:
+        """Значение регистра из его байт в буфере buf, без выделения памяти в куче."""
+        size = self.size
+        val = 0
+        if self.big:
+            for i in range(size):
+                val = (val << 8) | buf[i]
+        else:
+            for i in range(size - 1, -1, -1):
+                val = (val << 8) | buf[i]
+        if self.signed and val & (1 << (8 * size - 1)):
+            val -= 1 << (8 * size)
+        return val
+
+    @micropython.native
+    def encode(self, value: int, buf):
+        """Записывает значение регистра в буфер buf, без выделения памяти в куче."""
+        size = self.size
+        for i in range(size):
+            buf[size - 1 - i if self.big else i] = (value >> (8 * i)) & 0xFF
+
+    def __repr__(self):
+        return f"Reg({self.name}, 0x{self.address:02X}, {self.size})"
+
+
+class RegisterMap:
+    """Карта регистров устройства. Регистры описываются один раз (Reg); чтение и запись одиночных регистров
+    выполняются через заранее выделенный буфер, блок смежных регистров читается за одну транзакцию
+    и распаковывается одним предкомпилированным форматом (read_block).
+    Example:
+        >>> regs = RegisterMap(device, (Reg("ID", 0xD0), Reg("AC1", 0xAA, 2, True), Reg("AC2", 0xAC, 2, True)))
+        >>> regs.read("ID")
+        >>> regs.read_block("AC1", "AC2")
+    """
+
+    def __init__(self, device, regs):
+        """device - устройство (DeviceEx); regs - последовательность описаний регистров Reg."""
+        self._device = device
+        self._regs = {}
+        size = 1
+        for reg in regs:
+            self._regs[reg.name] = reg
+            size = max(size, reg.size)
+        self._buf = bytearray(size)
+        _mv = memoryview(self._buf)
+        # представления буфера по размеру регистра: не создаются при каждом обмене
+        self._views = tuple(_mv[:n] for n in range(size + 1))
+        self._blocks = {}
+
+    def __getitem__(self, name: str) -> Reg:
+        return self._regs[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._regs
+
+    def _reg(self, reg: Reg | str) -> Reg:
+        return reg if isinstance(reg, Reg) else self._regs[reg]
+
+    def read(self, reg: Reg | str) -> int:
+        """Считывает значение регистра reg (Reg или имя)."""
+        reg = self._reg(reg)
+        view = self._views[reg.size]
+        self._device.read_buf_from_mem(reg.address, view)
+        return reg.decode(view)
+
+    def write(self, reg: Reg | str, value: int):
+        """Записывает значение value в регистр reg (Reg или имя)."""
+        reg = self._reg(reg)
+        view = self._views[reg.size]
+        reg.encode(value, view)
+        self._device.write_buf_to_mem(reg.address, view)
+
+    def read_into(self, reg: Reg | str, buf):
+        """Считывает байты, начиная с адреса регистра reg, в буфер buf (кол-во байт равно длине buf)."""
+        self._device.read_buf_from_mem(self._reg(reg).address, buf)
+        return buf
+
+    def block(self, first: str, last: str) -> tuple:
+        """Компилирует блок смежных регистров от first до last включительно (по адресам).
+        Возвращает (формат, буфер, кол-во значений). Блоки кэшируются."""
+        key = first, last
+        blk = self._blocks.get(key)
+        if blk is not None:
+            return blk
+        start, end_reg = self._regs[first], self._regs[last]
+        end = end_reg.address + end_reg.size
+        regs = sorted((r for r in self._regs.values() if start.address <= r.address and r.address + r.size <= end),
+                      key=lambda r: r.address)
+        fmt, addr, big = [], start.address, start.big
+        for reg in regs:
+            if reg.address < addr:
+                raise ValueError(f"Overlapped registers in block: {reg}")
+            if reg.size > 1 and reg.big != big:
+                raise ValueError(f"Mixed byte order in block: {reg}")
+            if reg.fmt_char is None:
+                raise ValueError(f"Register can not be decoded in block: {reg}")
+            if reg.address > addr:
+                fmt.append(f"{reg.address - addr}x")    # пропуск байт между регистрами
+            fmt.append(reg.fmt_char)
+            addr = reg.address + reg.size
+        codec = make_codec(('>' if big else '<') + "".join(fmt))
+        blk = self._blocks[key] = codec, bytearray(end - start.address), len(regs)
+        return blk
+
+    def read_block(self, first: str, last: str) -> tuple:
+        """Считывает блок смежных регистров от first до last за одну транзакцию и возвращает их значения."""
+        codec, buf, _ = self.block(first, last)
+        self._device.read_buf_from_mem(self._regs[first].address, buf)
+        return codec.unpack(buf)
+
+
 class Device:
     """Класс - основа датчика"""
 
@@ -132,6 +290,8 @@ class Device:
         # передавать первым битом старший или младший
         # для каждого устройства!
         self.msb_first = True
+        # предкомпилированные форматы struct по порядку байт и символу формата (смотри _get_codec)
+        self._codecs = {'>': {}, '<': {}}
 
     def _get_byteorder_as_str(self) -> tuple:
         """Return byteorder as string"""
@@ -139,22 +299,31 @@ class Device:
             return 'big', '>'
         return 'little', '<'
 
-    def pack(self, fmt_char: str, *values) -> bytes:
+    def _get_codec(self, fmt_char: str, bo: str | None = None):
+        """Возвращает предкомпилированный формат (make_codec) для fmt_char и порядка байт bo
+        ('>', '<', '!', '=' или '@', см. struct).
+        bo в None - порядок байт устройства. Форматы создаются один раз и хранятся в экземпляре."""
         if not fmt_char:
             raise ValueError("Invalid fmt_char parameter!")
-        bo = self._get_byteorder_as_str()[1]
-        return struct.pack(bo + fmt_char, values)
+        if bo is None:
+            bo = '>' if self.is_big_byteorder() else '<'
+        codecs = self._codecs.get(bo)
+        if codecs is None:  # редкие порядки байт ('!', '=', '@') - по первому запросу
+            codecs = self._codecs[bo] = {}
+        codec = codecs.get(fmt_char)
+        if codec is None:
+            codec = codecs[fmt_char] = make_codec(bo + fmt_char)
+        return codec
+
+    def pack(self, fmt_char: str, *values) -> bytes:
+        return self._get_codec(fmt_char).pack(*values)
 
     def unpack(self, fmt_char: str, source: bytes, redefine_byte_order: str = None) -> tuple:
         """распаковка массива, считанного из датчика.
         Если redefine_byte_order != None, то bo (смотри ниже) = redefine_byte_order
         fmt_char: c, b, B, h, H, i, I, l, L, q, Q. pls see: https://docs.python.org/3/library/struct.html"""
-        if not fmt_char:
-            raise ValueError("Invalid fmt_char parameter!")
-        bo = self._get_byteorder_as_str()[1]
-        if redefine_byte_order is not None:
-            bo = redefine_byte_order[0]
-        return struct.unpack(bo + fmt_char, source)
+        bo = None if redefine_byte_order is None else redefine_byte_order[0]
+        return self._get_codec(fmt_char, bo).unpack(source)
 
     @micropython.native
     def is_big_byteorder(self) -> bool:
@@ -171,6 +340,11 @@ class DeviceEx(Device):
         Добавил 25.01.2024"""
         return self.adapter.read_register(self.address, reg_addr, bytes_count)
 
+    def read_reg_into(self, reg_addr: int, buf) -> bytes:
+        """считывает из регистра датчика значение в буфер buf без выделения памяти в куче.
+        Размер значения в байтах равен длине буфера buf. Возвращает ссылку на buf."""
+        return self.adapter.read_register_into(self.address, reg_addr, buf)
+
     # BaseSensor
     def write_reg(self, reg_addr: int, value: int | bytes | bytearray, bytes_count) -> int:
         """записывает данные value в датчик, по адресу reg_addr.
@@ -180,9 +354,17 @@ class DeviceEx(Device):
         return self.adapter.write_register(self.address, reg_addr, value, bytes_count, byte_order)
 
     def read_reg_16(self, address: int, signed: bool = False) -> int:
-        """Чтение регистра разрядностью 16 бит"""
-        _raw = self.read_reg(address, 2)
-        return self.unpack("h" if signed else "H", _raw)[0]
+        """Чтение регистра разрядностью 16 бит. Буфер берется из пула адаптера (без выделения памяти в куче)"""
+        pool = self.adapter.pool
+        views = pool.get()
+        try:
+            b = self.read_reg_into(address, views[2])
+            val = (b[0] << 8) | b[1] if self.is_big_byteorder() else (b[1] << 8) | b[0]
+        finally:
+            pool.put(views)
+        if signed and val & 0x8000:
+            val -= 0x10000
+        return val
 
     def write_reg_16(self, address: int, value: int):
         """Запись регистра разрядностью 16 бит"""
@@ -211,6 +393,11 @@ class DeviceEx(Device):
         Запись начинается с адреса в устройстве: mem_addr."""
         return self.adapter.write_buf_to_memory(self.address, mem_addr, buf)
 
+    def transaction(self):
+        """Транзакция на шине устройства (смотри bus_service.BusAdapter.transaction).
+        with device.transaction(): ..."""
+        return self.adapter.transaction()
+
 
 class BaseSensor(Device):
     """Класс - основа датчика с дополнительными методами"""
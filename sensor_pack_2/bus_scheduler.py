@@ -0,0 +1,151 @@
+# micropython
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Планировщик обмена нескольких устройств на общей шине.
+Запросы (функции обмена с устройством) выполняются внутри транзакции шины (BusAdapter.transaction)
+в порядке крайних сроков (earliest deadline first). Периодический запрос не может выполняться раньше своего
+момента готовности, поэтому частые устройства не вытесняют редкие: запрос редкого устройства со временем
+получает самый ранний крайний срок.
+
+Example:
+    >>> sched = BusScheduler(adapter)
+    >>> sched.add(fast_sensor.poll, period_ms=10, name="bmp180")
+    >>> sched.add(slow_sensor.poll, period_ms=1000, name="sht")
+    >>> while True:
+    ...     sched.run_once() or time.sleep_ms(sched.idle_ms())
+"""
+import time
+from micropython import const
+
+from sensor_pack_2.bus_service import BusAdapter
+
+# индексы полей запроса
+_NAME = const(0)
+_FUNC = const(1)
+_PERIOD = const(2)      # период, мс; 0 - однократный запрос
+_RELEASE = const(3)     # момент готовности (ticks_ms), раньше которого запрос не выполняется
+_DEADLINE = const(4)    # крайний срок (ticks_ms)
+_RUNS = const(5)        # кол-во выполнений
+_LATE = const(6)        # кол-во выполнений позже крайнего срока
+_MAX_LATE = const(7)    # наибольшее опоздание, мс
+
+
+class BusScheduler:
+    """Планировщик запросов к устройствам на одной шине."""
+
+    def __init__(self, adapter: BusAdapter):
+        self._adapter = adapter
+        adapter.lock.timing = True      # для отчета (get_report) нужно время занятости шины
+        self._queue = []
+        # счетчики выполненных однократных запросов для отчета: {имя: [выполнений, опозданий, наиб. опоздание]}.
+        # Запросы без имени учитываются вместе, под именем None, поэтому память не растет с числом запросов
+        self._done = {}
+
+    def add(self, func, period_ms: int, name: str | None = None, deadline_ms: int | None = None,
+            phase_ms: int = 0) -> list:
+        """Добавляет периодический запрос: func() вызывается каждые period_ms мс.
+        deadline_ms - допустимая задержка выполнения от момента готовности, None - равна периоду;
+        phase_ms - задержка первого выполнения. Возвращает запрос (для remove)."""
+        if period_ms <= 0:
+            raise ValueError(f"Invalid period_ms value: {period_ms}")
+        return self._push(name, func, period_ms, phase_ms, period_ms if deadline_ms is None else deadline_ms)
+
+    def submit(self, func, deadline_ms: int = 0, name: str | None = None) -> list:
+        """Добавляет однократный запрос, готовый к выполнению сразу, с крайним сроком через deadline_ms мс."""
+        return self._push(name, func, 0, 0, deadline_ms)
+
+    def _push(self, name, func, period: int, phase_ms: int, deadline_ms: int) -> list:
+        release = time.ticks_add(time.ticks_ms(), phase_ms)
+        req = [name, func, period, release, time.ticks_add(release, deadline_ms), 0, 0, 0]
+        self._queue.append(req)
+        return req
+
+    def remove(self, req: list):
+        """Удаляет запрос из очереди."""
+        self._queue.remove(req)
+
+    def _next(self, now: int) -> list | None:
+        """Готовый к выполнению запрос с самым ранним крайним сроком или None."""
+        best = None
+        for req in self._queue:
+            if time.ticks_diff(now, req[_RELEASE]) >= 0 and (
+                    best is None or time.ticks_diff(req[_DEADLINE], best[_DEADLINE]) < 0):
+                best = req
+        return best
+
+    def run_once(self) -> bool:
+        """Выполняет один готовый запрос. Возвращает Истина, если запрос был выполнен."""
+        now = time.ticks_ms()
+        req = self._next(now)
+        if req is None:
+            return False
+        late = time.ticks_diff(now, req[_DEADLINE])
+        if late > 0:
+            req[_LATE] += 1
+            if late > req[_MAX_LATE]:
+                req[_MAX_LATE] = late
+        req[_RUNS] += 1
+        period = req[_PERIOD]
+        if period:
+            # следующий момент готовности отсчитывается от предыдущего, а не от текущего времени (без дрейфа).
+            # Целиком пропущенные периоды не выполняются пачкой.
+            release = time.ticks_add(req[_RELEASE], period)
+            behind = time.ticks_diff(now, release)
+            if behind >= period:
+                release = time.ticks_add(now, -(behind % period))
+            req[_DEADLINE] = time.ticks_add(release, time.ticks_diff(req[_DEADLINE], req[_RELEASE]))
+            req[_RELEASE] = release
+        else:
+            self._queue.remove(req)
+            self._retire(req)
+        with self._adapter.transaction():
+            req[_FUNC]()
+        return True
+
+    def _retire(self, req: list):
+        """Переносит счетчики однократного запроса, покидающего очередь, в отчет."""
+        stats = self._done.get(req[_NAME])
+        if stats is None:
+            self._done[req[_NAME]] = [req[_RUNS], req[_LATE], req[_MAX_LATE]]
+            return
+        stats[0] += req[_RUNS]
+        stats[1] += req[_LATE]
+        stats[2] = max(stats[2], req[_MAX_LATE])
+
+    def idle_ms(self) -> int:
+        """Время в мс до момента готовности ближайшего запроса (0 - есть готовый запрос)."""
+        now = time.ticks_ms()
+        res = None
+        for req in self._queue:
+            wait = max(0, time.ticks_diff(req[_RELEASE], now))
+            if res is None or wait < res:
+                res = wait
+        return 0 if res is None else res
+
+    def run(self, duration_ms: int):
+        """Выполняет запросы в течение duration_ms мс."""
+        end = time.ticks_add(time.ticks_ms(), duration_ms)
+        while time.ticks_diff(end, time.ticks_ms()) > 0:
+            if not self.run_once():
+                time.sleep_ms(max(1, min(self.idle_ms(), time.ticks_diff(end, time.ticks_ms()))))
+
+    def get_report(self) -> dict:
+        """Отчет: utilization - доля времени занятости шины транзакциями (0..1), transactions - их кол-во;
+        requests - {имя: (выполнений, опозданий, наибольшее опоздание в мс)}, включая выполненные однократные
+        запросы (без имени - под ключом None)."""
+        lock = self._adapter.lock
+        requests = {}
+        for name, stats in self._done.items():
+            requests[name] = tuple(stats)
+        for req in self._queue:
+            key = req[_NAME] if req[_NAME] is not None else id(req)
+            runs, late, max_late = requests.get(key, (0, 0, 0))     # однократный запрос с тем же именем
+            requests[key] = runs + req[_RUNS], late + req[_LATE], max(max_late, req[_MAX_LATE])
+        return {"utilization": lock.utilization(), "transactions": lock.transactions, "requests": requests}
+
+    def reset_report(self):
+        """Обнуляет счетчики отчета."""
+        self._adapter.lock.reset_stats()
+        self._done.clear()
+        for req in self._queue:
+            req[_RUNS] = req[_LATE] = req[_MAX_LATE] = 0
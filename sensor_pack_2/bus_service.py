@@ -4,8 +4,16 @@
 """MicroPython модуль для работы с шинами ввода/вывода"""
 
 import math
+import time
 from machine import I2C, SPI, Pin
 
+try:
+    import _thread
+    _allocate_lock = _thread.allocate_lock
+    _get_ident = _thread.get_ident
+except ImportError:     # порт без поддержки потоков
+    _allocate_lock = _get_ident = None
+
 
 def mpy_bl(value: int) -> int:
     """Возвращает место, занимаемое значением value в битах.
@@ -15,10 +23,151 @@ def mpy_bl(value: int) -> int:
     return 1 + int(math.log2(abs(value)))
 
 
+class BusLock:
+    """Блокировка шины, одна на адаптер. Повторно входимая: поток, владеющий блокировкой,
+    может захватывать ее снова (вложенные транзакции). Считает транзакции; время занятости шины
+    учитывается только при timing = Истина (BusScheduler включает его сам), чтобы каждый обмен по шине
+    не платил за два вызова ticks_us."""
+    def __init__(self):
+        self._lock = _allocate_lock() if _allocate_lock is not None else None
+        self._owner = None
+        self._depth = 0
+        # учитывать время занятости шины (busy_us, utilization)
+        self.timing = False
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Обнуляет учет времени занятости шины."""
+        self.busy_us = 0                        # суммарное время удержания блокировки, мкс (при timing)
+        self.transactions = 0                   # кол-во транзакций (внешних захватов)
+        self._t_acquire = 0
+        self._t_reset = time.ticks_us()
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Захватывает блокировку. Возвращает Истина при успехе."""
+        lock = self._lock
+        if lock is None:        # порт без потоков: владелец всегда один
+            self._depth += 1
+            if 1 == self._depth and self.timing:
+                self._t_acquire = time.ticks_us()
+            return True
+        me = _get_ident()
+        if self._depth and self._owner == me:
+            self._depth += 1
+            return True
+        if not lock.acquire(blocking):
+            return False
+        self._owner = me
+        self._depth = 1
+        if self.timing:
+            self._t_acquire = time.ticks_us()
+        return True
+
+    def release(self):
+        """Освобождает блокировку."""
+        if not self._depth:
+            raise RuntimeError("BusLock is not acquired")
+        self._depth -= 1
+        if self._depth:
+            return
+        if self.timing:
+            self.busy_us += time.ticks_diff(time.ticks_us(), self._t_acquire)
+        self.transactions += 1
+        self._owner = None
+        if self._lock is not None:
+            self._lock.release()
+
+    def locked(self) -> bool:
+        return 0 != self._depth
+
+    def utilization(self) -> float:
+        """Доля времени (0..1) с момента reset_stats, в течение которого шина была занята транзакциями.
+        Имеет смысл только при timing = Истина."""
+        elapsed = time.ticks_diff(time.ticks_us(), self._t_reset)
+        return self.busy_us / elapsed if elapsed > 0 else 0.0
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # без *args: в MicroPython упаковка аргументов в кортеж выделяла бы память кучи при каждом обмене
+        self.release()
+
+
+class BufferPool:
+    """Пул буферов фиксированного размера для обмена по шине без выделения памяти в куче.
+    Буфер берется методом get и обязательно возвращается методом put:
+        views = pool.get()
+        try:
+            buf = views[n]      # memoryview первых n байт буфера, n <= pool.size
+            ...
+        finally:
+            pool.put(views)
+    Если свободных буферов нет (например, при обмене из нескольких потоков), get создает новый буфер,
+    который после put в пул не попадает. Взятие и возврат атомарны (list.pop/list.append)."""
+    def __init__(self, count: int = 4, size: int = 16):
+        """count - кол-во буферов; size - размер буфера в байтах."""
+        self.count = count
+        self.size = size
+        self._free = [self._make() for _ in range(count)]
+
+    def _make(self) -> tuple:
+        # представления буфера всех длин от 0 до size создаются один раз
+        _mv = memoryview(bytearray(self.size))
+        return tuple(_mv[:n] for n in range(self.size + 1))
+
+    def get(self) -> tuple:
+        """Возвращает буфер в виде кортежа его представлений (memoryview): элемент n - первые n байт буфера."""
+        try:
+            return self._free.pop()
+        except IndexError:
+            return self._make()
+
+    def put(self, views: tuple):
+        """Возвращает буфер, полученный методом get, в пул."""
+        if len(self._free) < self.count:
+            self._free.append(views)
+
+    def free(self) -> int:
+        """Кол-во свободных буферов в пуле."""
+        return len(self._free)
+
+
+# пул буферов по умолчанию, общий для всех адаптеров
+default_pool = BufferPool()
+
+
+def to_buf(value: int, buf, byte_order: str):
+    """Записывает целое value в буфер buf (все len(buf) байт) с порядком байт byte_order ('big' или 'little').
+    Аналог int.to_bytes без выделения памяти в куче."""
+    n = len(buf)
+    big = 'big' == byte_order
+    for i in range(n):
+        buf[n - 1 - i if big else i] = (value >> (8 * i)) & 0xFF
+    return buf
+
+
 class BusAdapter:
     """Посредник между шиной ввода/вывода и классом ввода/вывода устройства"""
-    def __init__(self, bus: I2C | SPI):
+    def __init__(self, bus: I2C | SPI, pool: BufferPool | None = None):
+        """pool - пул буферов для обмена одиночными регистрами и заполнения, None - общий пул default_pool."""
         self.bus = bus
+        # блокировка шины для устройств, использующих ее совместно из нескольких потоков.
+        # Каждый обмен (метод наследника) выполняется под ней, поэтому одиночный обмен другого потока
+        # ожидает окончания чужой транзакции
+        self.lock = BusLock()
+        self.pool = pool if pool is not None else default_pool
+
+    def transaction(self) -> BusLock:
+        """Транзакция: последовательность обменов с устройством, которую не должны прерывать обмены
+        других устройств на той же шине (например, запуск преобразования и чтение результата).
+        Использование:
+            with adapter.transaction():
+                adapter.write(...)
+                adapter.read(...)
+        Транзакции могут быть вложенными."""
+        return self.lock
 
     def get_bus_type(self) -> type:
         """Возвращает тип шины"""
@@ -31,6 +180,11 @@ class BusAdapter:
         bytes_count - размер значения в байтах."""
         raise NotImplementedError()
 
+    def read_register_into(self, device_addr: int | Pin, reg_addr: int, buf: bytearray | memoryview):
+        """считывает из регистра датчика значение в буфер buf, без выделения памяти в куче;
+        размер значения в байтах равен длине буфера buf. Возвращает ссылку на buf."""
+        return self.read_buf_from_memory(device_addr, reg_addr, buf, 1)
+
     def write_register(self, device_addr: int | Pin, reg_addr: int, value: int | bytes | bytearray | memoryview,
                        bytes_count: int, byte_order: str):
         """записывает данные value в датчик, по адресу reg_addr.
@@ -63,19 +217,24 @@ class BusAdapter:
         bl = mpy_bl(val)
         if bl > 8:
             raise ValueError(f"The value must take no more than 8 bits! Current: {bl}")
-        _max = 16
-        if count < _max:
-            _max = count
-        # вычисляю кол-во повторений тела цикла
-        repeats = count // _max  # количество итераций
-        b = bytearray([val for _ in range(_max)])
-        for _ in range(repeats):
-            self.write(device_addr, b)
-        # вычисляю остаток
-        remainder = count - _max * repeats
-        if remainder:
-            b = bytearray([val for _ in range(remainder)])
-            self.write(device_addr, b)
+        pool = self.pool
+        views = pool.get()
+        try:
+            _max = min(count, pool.size)
+            b = views[_max]
+            for i in range(_max):
+                b[i] = val
+            # вычисляю кол-во повторений тела цикла
+            repeats = count // _max  # количество итераций
+            with self.lock:     # все посылки - одной транзакцией
+                for _ in range(repeats):
+                    self.write(device_addr, b)
+                # вычисляю остаток
+                remainder = count - _max * repeats
+                if remainder:
+                    self.write(device_addr, views[remainder])
+        finally:
+            pool.put(views)
 
     def read_buf_from_memory(self, device_addr: int | Pin, mem_addr, buf: bytearray | memoryview, address_size: int):
         """Читает из устройства с адресом device_addr в буфер buf, начиная с адреса в устройстве mem_addr;
@@ -90,37 +249,54 @@ class BusAdapter:
 
 class I2cAdapter(BusAdapter):
     """Адаптер шины I2C"""
-    def __init__(self, bus: I2C):
-        super().__init__(bus)
+    def __init__(self, bus: I2C, pool: BufferPool | None = None):
+        super().__init__(bus, pool)
 
     def write_register(self, device_addr: int, reg_addr: int, value: int | bytes | bytearray | memoryview,
                        bytes_count: int, byte_order: str):
         """записывает данные value в датчик, по адресу reg_addr.
         bytes_count - кол-во записываемых данных
-        value - должно быть типов int, bytes, bytearray"""
-        buf = None
-        if isinstance(value, int):
-            buf = value.to_bytes(bytes_count, byte_order)
-        if isinstance(value, (bytes, bytearray)):
-            buf = value
-
-        return self.bus.writeto_mem(device_addr, reg_addr, buf)
+        value - должно быть типов int, bytes, bytearray, memoryview.
+        Целое значение записывается через буфер из пула, без выделения памяти в куче."""
+        if not isinstance(value, int):
+            with self.lock:
+                return self.bus.writeto_mem(device_addr, reg_addr, value)
+        pool = self.pool
+        if bytes_count > pool.size:
+            with self.lock:
+                return self.bus.writeto_mem(device_addr, reg_addr, value.to_bytes(bytes_count, byte_order))
+        views = pool.get()
+        try:
+            with self.lock:
+                return self.bus.writeto_mem(device_addr, reg_addr, to_buf(value, views[bytes_count], byte_order))
+        finally:
+            pool.put(views)
 
     def read_register(self, device_addr: int, reg_addr: int, bytes_count: int) -> bytes:
         """считывает из регистра датчика значение;
         bytes_count - размер значения в байтах"""
-        return self.bus.readfrom_mem(device_addr, reg_addr, bytes_count)
+        with self.lock:
+            return self.bus.readfrom_mem(device_addr, reg_addr, bytes_count)
+
+    def read_register_into(self, device_addr: int, reg_addr: int, buf: bytearray | memoryview):
+        """считывает из регистра датчика значение в буфер buf; размер значения в байтах равен длине буфера buf"""
+        with self.lock:
+            self.bus.readfrom_mem_into(device_addr, reg_addr, buf)
+        return buf
 
     def read(self, device_addr: int, n_bytes: int) -> bytes:
-        return self.bus.readfrom(device_addr, n_bytes)
+        with self.lock:
+            return self.bus.readfrom(device_addr, n_bytes)
 
     def read_to_buf(self, device_addr: int, buf: bytearray | memoryview) -> bytes:
         """Читает из устройства на шине с адресом device_addr в буфер buf количество байт, равное длине(len) буфера!"""
-        self.bus.readfrom_into(device_addr, buf)
+        with self.lock:
+            self.bus.readfrom_into(device_addr, buf)
         return buf
     
     def write(self, device_addr: int, buf: bytes | bytearray | memoryview):
-        return self.bus.writeto(device_addr, buf)
+        with self.lock:
+            return self.bus.writeto(device_addr, buf)
 
     def read_buf_from_memory(self, device_addr: int, mem_addr, buf: bytearray | memoryview, address_size: int = 1):
         """Читает из устройства с адресом device_addr в буфер buf, начиная с адреса в устройстве mem_addr;
@@ -128,22 +304,24 @@ class I2cAdapter(BusAdapter):
         address_size - определяет размер адреса в байтах. (в ESP8266 этот аргумент не распознается и размер адреса
         всегда равен 1 (8 бит)).
         Расширение возможностей базового класса."""
-        self.bus.readfrom_mem_into(device_addr, mem_addr, buf)
+        with self.lock:
+            self.bus.readfrom_mem_into(device_addr, mem_addr, buf)
         return buf
 
     def write_buf_to_memory(self, device_addr: int, mem_addr, buf: bytes | bytearray | memoryview):
         """Записывает в устройство с адресом device_addr все байты из буфера buf.
         Запись начинается с адреса в устройстве: mem_addr.
         Расширение возможностей базового класса."""
-        return self.bus.writeto_mem(device_addr, mem_addr, buf)
+        with self.lock:
+            return self.bus.writeto_mem(device_addr, mem_addr, buf)
 
 
 class SpiAdapter(BusAdapter):
     """Адаптер шины SPI"""
-    def __init__(self, bus: SPI, data_mode: Pin = None):
+    def __init__(self, bus: SPI, data_mode: Pin = None, pool: BufferPool | None = None):
         """Параметр data_mode представляет собой вывод MCU, который используется для установки флага,
         что посылка является данными (high) или командой (low). Например, это необходимо при обмене с ILI9481."""
-        super().__init__(bus)
+        super().__init__(bus, pool)
         # вывод MCU для режима данных
         self.data_mode_pin = data_mode
         # использовать ли вывод MCU для режима данных (Истина) или команд (Ложь)
@@ -157,6 +335,8 @@ class SpiAdapter(BusAdapter):
         # вида prepare(buf:bytearray, address_index:int) -> bytes: ...
         # или None
         self._prepare_before_send_ref = None
+        # ссылка на функцию подготовки команды (адреса) перед чтением из памяти устройства, того же вида, или None
+        self._prepare_before_read_ref = None
 
     @property
     def prepare_func(self):
@@ -168,28 +348,90 @@ class SpiAdapter(BusAdapter):
         """Устанавливает ссылку на функцию обработки буфера перед отправкой его по шине"""
         self._prepare_before_send_ref = value
 
-    def _call_prepare(self, buf: bytearray):
-        ref = self._prepare_before_send_ref
+    @property
+    def prepare_read_func(self):
+        """Возвращает ссылку на функцию обработки команды (адреса) перед чтением из памяти устройства"""
+        return self._prepare_before_read_ref
+
+    @prepare_read_func.setter
+    def prepare_read_func(self, value):
+        """Устанавливает ссылку на функцию обработки команды (адреса) перед чтением из памяти устройства.
+        Без нее адрес отправляется без изменений и признак чтения, если он нужен устройству, должен быть
+        в адресе, переданном вызывающим. Например, для датчиков Bosch (бит 7 адреса - признак чтения):
+            adapter.prepare_read_func = lambda buf, i: buf.__setitem__(i, buf[i] | 0x80)"""
+        self._prepare_before_read_ref = value
+
+    def _call_prepare(self, buf: bytearray, is_write: bool = True):
+        ref = self._prepare_before_send_ref if is_write else self._prepare_before_read_ref
         if ref is not None:
             ref(buf, self._address_index)
 
-    def read(self, device_addr: Pin, n_bytes: int) -> bytes:
-        """Read a number of bytes specified by n_bytes while continuously writing the single byte given by write.
-        Returns a bytes object with the data that was read."""
+    def _mem_transfer(self, device_addr: Pin, mem_addr: int, buf, address_size: int, is_write: bool):
+        """Обмен с памятью (регистрами) устройства за одно выделение устройства (chip select):
+        команда - адрес mem_addr размером address_size байт, старшим байтом вперед, затем данные из/в buf.
+        Команда формируется в буфере из пула, данные передаются/принимаются прямо из/в buf, без копирования.
+        Перед записью функция prepare_func обрабатывает команду (адрес находится в байте _address_index),
+        например, сбрасывает бит 7 адреса (признак чтения) у датчиков Bosch; перед чтением - функция
+        prepare_read_func, например, устанавливает этот бит."""
+        pool = self.pool
+        views = pool.get()
         try:
-            device_addr.value(0)
-            return self.bus.read(n_bytes)
+            cmd = to_buf(mem_addr, views[address_size], 'big')
+            self._call_prepare(cmd, is_write)
+            bus = self.bus
+            with self.lock:
+                try:
+                    device_addr.value(0)  # chip select
+                    bus.write(cmd)
+                    if is_write:
+                        bus.write(buf)
+                    else:
+                        bus.readinto(buf, 0x00)
+                finally:
+                    device_addr.value(1)
         finally:
-            device_addr.value(1)
+            pool.put(views)
+        return buf
 
-    def read_to_buf(self, device_addr: Pin, buf) -> bytes:
-        """Читает из устройства на шине с адресом device_addr в буфер buf количество байт, равное длине(len) буфера!"""
+    def read_register(self, device_addr: Pin, reg_addr: int, bytes_count: int) -> bytes:
+        """считывает из регистра датчика значение; bytes_count - размер значения в байтах"""
+        return self._mem_transfer(device_addr, reg_addr, bytearray(bytes_count), 1, False)
+
+    def write_register(self, device_addr: Pin, reg_addr: int, value: int | bytes | bytearray | memoryview,
+                       bytes_count: int, byte_order: str):
+        """записывает данные value в датчик, по адресу reg_addr.
+        Целое значение записывается через буфер из пула, без выделения памяти в куче."""
+        if not isinstance(value, int):
+            return self._mem_transfer(device_addr, reg_addr, value, 1, True)
+        pool = self.pool
+        if bytes_count > pool.size:
+            return self._mem_transfer(device_addr, reg_addr, value.to_bytes(bytes_count, byte_order), 1, True)
+        views = pool.get()
         try:
-            device_addr.value(0)
-            self.bus.readinto(buf, 0x00)
-            return buf
+            self._mem_transfer(device_addr, reg_addr, to_buf(value, views[bytes_count], byte_order), 1, True)
         finally:
-            device_addr.value(1)
+            pool.put(views)
+
+    def read(self, device_addr: Pin, n_bytes: int) -> bytes:
+        """Read a number of bytes specified by n_bytes while continuously writing the single byte given by write.
+        Returns a bytes object with the data that was read.
+        Возвращает новый объект bytes; для чтения без выделения памяти в куче используйте read_to_buf."""
+        with self.lock:
+            try:
+                device_addr.value(0)
+                return self.bus.read(n_bytes)
+            finally:
+                device_addr.value(1)
+
+    def read_to_buf(self, device_addr: Pin, buf) -> bytes:
+        """Читает из устройства на шине с адресом device_addr в буфер buf количество байт, равное длине(len) буфера!"""
+        with self.lock:
+            try:
+                device_addr.value(0)
+                self.bus.readinto(buf, 0x00)
+                return buf
+            finally:
+                device_addr.value(1)
 
     def write(self, device_addr: Pin, buf: bytes | bytearray | memoryview):
         """Параметр data_packet представляет собой признак того, что посылка является данными (high) или командой (low).
@@ -197,13 +439,14 @@ class SpiAdapter(BusAdapter):
         Write the bytes contained in buf. Returns None.
         The data_packet parameter is an indication that the package is data (high) or command (low).
          For example, this is necessary when exchanging ILI9481."""
-        try:
-            device_addr.value(0)   # chip select
-            if self.use_data_mode_pin and self.data_mode_pin:
-                self.data_mode_pin.value(self.data_packet)
-            return self.bus.write(buf)
-        finally:
-            device_addr.value(1)
+        with self.lock:
+            try:
+                device_addr.value(0)   # chip select
+                if self.use_data_mode_pin and self.data_mode_pin:
+                    self.data_mode_pin.value(self.data_packet)
+                return self.bus.write(buf)
+            finally:
+                device_addr.value(1)
 
     def write_and_read(self, device_addr: Pin, wr_buf: bytes, rd_buf: bytes):
         """Одновременная запись и чтение байт.
@@ -219,30 +462,23 @@ class SpiAdapter(BusAdapter):
         but both buffers must have the same length. Returns None.
         The data_packet parameter is an indication that the package is data (high) or command (low).
          For example, this is necessary when exchanging ILI9481."""
-        try:
-            device_addr.value(0)   # chip select
-            if self.use_data_mode_pin and self.data_mode_pin:
-                self.data_mode_pin.value(self.data_packet)
-            return self.bus.write_readinto(wr_buf, rd_buf)
-        finally:
-            device_addr.value(1)
-
-    def read_buf_from_memory(self, device_addr: Pin, mem_addr, buf: bytearray | memoryview, address_size: int):
+        with self.lock:
+            try:
+                device_addr.value(0)   # chip select
+                if self.use_data_mode_pin and self.data_mode_pin:
+                    self.data_mode_pin.value(self.data_packet)
+                return self.bus.write_readinto(wr_buf, rd_buf)
+            finally:
+                device_addr.value(1)
+
+    def read_buf_from_memory(self, device_addr: Pin, mem_addr, buf: bytearray | memoryview, address_size: int = 1):
         """Читает из устройства с адресом device_addr в буфер buf, начиная с адреса в устройстве mem_addr.
-        Количество считываемых байт определяется длиной буфера buf."""
-        try:
-            device_addr.value(0)  # chip select
-            # пока нет реализации!!!
-            raise NotImplementedError()
-        finally:
-            device_addr.value(1)
+        Количество считываемых байт определяется длиной буфера buf.
+        address_size - размер адреса в байтах (не более размера буфера пула). Возвращает ссылку на buf.
+        Адрес обрабатывается функцией prepare_read_func перед отправкой."""
+        return self._mem_transfer(device_addr, mem_addr, buf, address_size, False)
 
     def write_buf_to_memory(self, device_addr: Pin, mem_addr, buf: bytes | bytearray | memoryview):
-        try:
-            device_addr.value(0)  # chip select
-            # подготовка буфера к пересылке
-            self._call_prepare(buf)
-            # пока нет реализации!!!
-            raise NotImplementedError()
-        finally:
-            device_addr.value(1)
+        """Записывает в устройство все байты из буфера buf, начиная с адреса в устройстве mem_addr.
+        Адрес обрабатывается функцией prepare_func перед отправкой."""
+        return self._mem_transfer(device_addr, mem_addr, buf, 1, True)
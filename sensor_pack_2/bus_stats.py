@@ -0,0 +1,164 @@
+# micropython
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Учет обмена по шине: кол-во транзакций по регистрам, объем данных, гистограмма длительности транзакций,
+ошибки OSError (EIO и прочие). Позволяет понять, на что уходит время: шину, паузы или вычисления.
+
+Example:
+    >>> stats = BusStats()
+    >>> adapter = InstrumentedAdapter(I2cAdapter(i2c), stats)
+    >>> ps = Bmp180(adapter)            # или instrument(device, stats) для уже созданного устройства
+    >>> ...
+    >>> print(stats.snapshot())
+    >>> stats.reset()
+"""
+import time
+
+from sensor_pack_2.bus_service import BusAdapter
+
+# ключ регистра для обмена без адреса регистра (read, write, read_to_buf)
+NO_REG = -1
+# методы адаптера, обмен через которые учитывается
+_METHODS = ("read_register", "read_register_into", "write_register", "read", "read_to_buf", "write",
+            "read_buf_from_memory", "write_buf_to_memory")
+
+
+class BusStats:
+    """Статистика обмена по шине. Один экземпляр может быть общим для нескольких адаптеров."""
+
+    def __init__(self, buckets: int = 16):
+        """buckets - кол-во интервалов гистограммы длительности транзакций. Интервал i содержит
+        транзакции длительностью [2**(i-1), 2**i) мкс, последний - все более длинные."""
+        self._buckets = buckets
+        self.reset()
+
+    def reset(self):
+        """Обнуляет статистику."""
+        self.transactions = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.busy_us = 0                # суммарная длительность транзакций, мкс
+        self.max_us = 0                 # наибольшая длительность транзакции, мкс
+        self.errors = 0                 # кол-во OSError
+        self._errno = {}                # errno: кол-во
+        self._regs = {}                 # регистр: [чтений, записей, байт]
+        self._hist = [0] * self._buckets
+
+    def record(self, reg: int, is_write: bool, n_bytes: int, us: int):
+        """Учитывает успешную транзакцию длительностью us мкс с регистром reg."""
+        self.transactions += 1
+        if is_write:
+            self.bytes_written += n_bytes
+        else:
+            self.bytes_read += n_bytes
+        self.busy_us += us
+        if us > self.max_us:
+            self.max_us = us
+        bucket, last = 0, self._buckets - 1
+        while us and bucket < last:
+            us >>= 1
+            bucket += 1
+        self._hist[bucket] += 1
+        counters = self._regs.get(reg)
+        if counters is None:
+            counters = self._regs[reg] = [0, 0, 0]
+        counters[1 if is_write else 0] += 1
+        counters[2] += n_bytes
+
+    def error(self, reg: int, exc: OSError):
+        """Учитывает ошибку обмена с регистром reg."""
+        self.errors += 1
+        code = exc.args[0] if exc.args else 0
+        self._errno[code] = self._errno.get(code, 0) + 1
+
+    def snapshot(self) -> dict:
+        """Возвращает копию статистики:
+        transactions, bytes_read, bytes_written, busy_us, max_us, errors - счетчики;
+        errno - {errno: кол-во} (5 - EIO, 19 - ENODEV, 110/116 - ETIMEDOUT);
+        registers - {регистр: (чтений, записей, байт)}, регистр NO_REG - обмен без адреса регистра;
+        histogram - кол-во транзакций по интервалам длительности (см. BusStats.__init__)."""
+        return {"transactions": self.transactions, "bytes_read": self.bytes_read,
+                "bytes_written": self.bytes_written, "busy_us": self.busy_us, "max_us": self.max_us,
+                "errors": self.errors, "errno": dict(self._errno),
+                "registers": {reg: tuple(val) for reg, val in self._regs.items()},
+                "histogram": list(self._hist)}
+
+
+class InstrumentedAdapter(BusAdapter):
+    """Адаптер-обертка, учитывающий обмен вложенного адаптера в BusStats.
+    Выключенный учет (enable(False)) не добавляет вычислений: методы обмена экземпляра
+    заменяются ссылками на методы вложенного адаптера."""
+
+    def __init__(self, adapter: BusAdapter, stats: BusStats | None = None, enabled: bool = True):
+        """adapter - вложенный адаптер шины; stats - статистика, None - новый экземпляр BusStats."""
+        super().__init__(adapter.bus, adapter.pool)
+        self.adapter = adapter
+        self.lock = adapter.lock    # блокировка шины общая с вложенным адаптером
+        self.stats = stats if stats is not None else BusStats()
+        self._enabled = None
+        self.enable(enabled)
+
+    def enable(self, value: bool | None = None) -> None | bool:
+        """Включает (Истина) или выключает (Ложь) учет. Если value в None, то возвращает текущее состояние."""
+        if value is None:
+            return self._enabled
+        self._enabled = value
+        src = self if value else self.adapter
+        prefix = "_stat_" if value else ""
+        for name in _METHODS:
+            setattr(self, name, getattr(src, prefix + name))
+        return None
+
+    def __getattr__(self, name):
+        # остальные методы и свойства (например, SpiAdapter.prepare_func) - от вложенного адаптера
+        if "adapter" == name:
+            raise AttributeError(name)
+        return getattr(self.adapter, name)
+
+    def _call(self, reg: int, is_write: bool, n_bytes: int, func, *args):
+        t = time.ticks_us()
+        try:
+            res = func(*args)
+        except OSError as e:
+            self.stats.error(reg, e)
+            raise
+        self.stats.record(reg, is_write, n_bytes, time.ticks_diff(time.ticks_us(), t))
+        return res
+
+    def _stat_read_register(self, device_addr, reg_addr: int, bytes_count: int) -> bytes:
+        return self._call(reg_addr, False, bytes_count, self.adapter.read_register, device_addr, reg_addr,
+                          bytes_count)
+
+    def _stat_read_register_into(self, device_addr, reg_addr: int, buf):
+        return self._call(reg_addr, False, len(buf), self.adapter.read_register_into, device_addr, reg_addr, buf)
+
+    def _stat_write_register(self, device_addr, reg_addr: int, value, bytes_count: int, byte_order: str):
+        return self._call(reg_addr, True, bytes_count, self.adapter.write_register, device_addr, reg_addr, value,
+                          bytes_count, byte_order)
+
+    def _stat_read(self, device_addr, n_bytes: int) -> bytes:
+        return self._call(NO_REG, False, n_bytes, self.adapter.read, device_addr, n_bytes)
+
+    def _stat_read_to_buf(self, device_addr, buf) -> bytes:
+        return self._call(NO_REG, False, len(buf), self.adapter.read_to_buf, device_addr, buf)
+
+    def _stat_write(self, device_addr, buf):
+        return self._call(NO_REG, True, len(buf), self.adapter.write, device_addr, buf)
+
+    def _stat_read_buf_from_memory(self, device_addr, mem_addr, buf, address_size: int = 1):
+        return self._call(mem_addr, False, len(buf), self.adapter.read_buf_from_memory, device_addr, mem_addr, buf,
+                          address_size)
+
+    def _stat_write_buf_to_memory(self, device_addr, mem_addr, buf):
+        return self._call(mem_addr, True, len(buf), self.adapter.write_buf_to_memory, device_addr, mem_addr, buf)
+
+
+def instrument(device, stats: BusStats | None = None, enabled: bool = True) -> InstrumentedAdapter:
+    """Подключает учет обмена к уже созданному устройству (sensor_pack_2.base_sensor.Device):
+    адаптер устройства заменяется оберткой InstrumentedAdapter, поэтому учитываются все точки
+    входа DeviceEx (read_reg, write_reg, read_buf_from_mem и т.д.). Возвращает обертку."""
+    adapter = device.adapter
+    if not isinstance(adapter, InstrumentedAdapter):
+        adapter = InstrumentedAdapter(adapter, stats, enabled)
+        device.adapter = adapter
+    return adapter
@@ -0,0 +1,253 @@
+# micropython
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Потоковые фильтры с постоянным временем обновления и заранее выделенной памятью:
+EMA, скользящее среднее, медиана, альфа-бета фильтр и одномерный фильтр Калмана.
+Фильтры объединяются в цепочку FilterChain.
+Нечисловые значения (None, NaN, inf), например, отсутствующие в SampleRing измерения, пропускаются:
+состояние фильтра не меняется, update возвращает текущее значение (value)."""
+import array
+import math
+
+
+def _finite(value) -> bool:
+    """Истина, если value - конечное число."""
+    return value is not None and math.isfinite(value)
+
+
+class IFilter:
+    """Интерфейс потокового фильтра"""
+
+    def update(self, value: float, dt: float = 1.0) -> float:
+        """Принимает очередное значение, возвращает отфильтрованное.
+        dt - интервал от предыдущего значения в секундах (используют фильтры, оценивающие скорость)."""
+        raise NotImplementedError()
+
+    def reset(self):
+        """Сбрасывает состояние фильтра."""
+        raise NotImplementedError()
+
+    @property
+    def value(self) -> float | None:
+        """Последнее отфильтрованное значение или None, если значений еще не было."""
+        raise NotImplementedError()
+
+
+class EmaFilter(IFilter):
+    """Экспоненциальное скользящее среднее (EMA).
+    alpha: 0.1..0.3 — плавное сглаживание, 0.4..0.6 — быстрый отклик."""
+
+    def __init__(self, alpha: float = 0.25):
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError(f"Invalid alpha value: {alpha}")
+        self._alpha = alpha
+        self._value = None
+
+    def update(self, value: float, dt: float = 1.0) -> float:
+        if not _finite(value):
+            return self._value
+        prev = self._value
+        self._value = value if prev is None else prev + self._alpha * (value - prev)
+        return self._value
+
+    def reset(self):
+        self._value = None
+
+    @property
+    def value(self) -> float | None:
+        return self._value
+
+
+class MovingAverage(IFilter):
+    """Простое скользящее среднее по последним window значениям.
+    Обновление O(1): бегущая сумма по кольцевому буферу. Для устранения накопления ошибки
+    округления (float одинарной точности в MicroPython) сумма пересчитывается каждые window обновлений."""
+
+    def __init__(self, window: int = 4):
+        if window < 1:
+            raise ValueError(f"Invalid window value: {window}")
+        self._buf = array.array("f", (0 for _ in range(window)))
+        self.reset()
+
+    def reset(self):
+        self._pos = self._count = 0
+        self._sum = 0.0
+
+    def update(self, value: float, dt: float = 1.0) -> float:
+        if not _finite(value):
+            return self.value
+        buf, pos = self._buf, self._pos
+        size = len(buf)
+        if self._count < size:
+            self._count += 1
+            self._sum += value
+        else:
+            self._sum += value - buf[pos]
+        buf[pos] = value
+        pos += 1
+        if pos == size:
+            pos = 0
+            if self._count == size:
+                self._sum = sum(buf)    # пересчет, раз в window обновлений
+        self._pos = pos
+        return self._sum / self._count
+
+    @property
+    def value(self) -> float | None:
+        return self._sum / self._count if self._count else None
+
+
+class MedianFilter(IFilter):
+    """Медианный фильтр по последним window значениям (нечетное число, обычно 3..9).
+    Значения хранятся в кольцевом буфере (порядок поступления) и в отсортированном массиве;
+    обновление - удаление старого и вставка нового значения в отсортированный массив, O(window),
+    без выделения памяти. Подавляет одиночные выбросы."""
+
+    def __init__(self, window: int = 5):
+        if window < 1 or 0 == window % 2:
+            raise ValueError(f"Invalid window value: {window}. Must be odd!")
+        self._ring = array.array("f", (0 for _ in range(window)))
+        self._sorted = array.array("f", (0 for _ in range(window)))
+        self.reset()
+
+    def reset(self):
+        self._pos = self._count = 0
+
+    def update(self, value: float, dt: float = 1.0) -> float:
+        if not _finite(value):
+            return self.value   # NaN не сравним ни с чем: ни вставить в порядок, ни найти для удаления
+        ring, srt, count = self._ring, self._sorted, self._count
+        size = len(ring)
+        if count == size:
+            # удаление самого старого значения из отсортированного массива
+            old = ring[self._pos]
+            i = 0
+            while srt[i] != old:
+                i += 1
+            while i < count - 1:
+                srt[i] = srt[i + 1]
+                i += 1
+            count -= 1
+        # вставка нового значения
+        i = count
+        while i > 0 and srt[i - 1] > value:
+            srt[i] = srt[i - 1]
+            i -= 1
+        srt[i] = value
+        self._count = count + 1
+        ring[self._pos] = value
+        self._pos = (self._pos + 1) % size
+        return self.value
+
+    @property
+    def value(self) -> float | None:
+        count = self._count
+        if not count:
+            return None
+        srt = self._sorted
+        if count % 2:
+            return srt[count >> 1]
+        return 0.5 * (srt[(count >> 1) - 1] + srt[count >> 1])
+
+
+class AlphaBetaFilter(IFilter):
+    """Альфа-бета фильтр (упрощенный фильтр Калмана с постоянными коэффициентами) для давления или высоты.
+    Оценивает значение и скорость его изменения (rate, ед./с), например, вертикальную скорость по высоте.
+    alpha - коэффициент коррекции значения (0..1), beta - коэффициент коррекции скорости (0..2)."""
+
+    def __init__(self, alpha: float = 0.5, beta: float = 0.1):
+        if not 0.0 < alpha <= 1.0 or not 0.0 <= beta <= 2.0:
+            raise ValueError(f"Invalid alpha/beta values: {alpha}, {beta}")
+        self._alpha = alpha
+        self._beta = beta
+        self.reset()
+
+    def reset(self):
+        self._value = None
+        self._rate = 0.0
+
+    def update(self, value: float, dt: float = 1.0) -> float:
+        """dt - интервал от предыдущего значения в секундах."""
+        if not _finite(value):
+            return self._value
+        if self._value is None:
+            self._value = value
+            return value
+        predicted = self._value + self._rate * dt
+        residual = value - predicted
+        self._value = predicted + self._alpha * residual
+        self._rate += self._beta * residual / dt
+        return self._value
+
+    @property
+    def value(self) -> float | None:
+        return self._value
+
+    @property
+    def rate(self) -> float:
+        """Оценка скорости изменения значения, ед./с."""
+        return self._rate
+
+
+class KalmanFilter(IFilter):
+    """Одномерный фильтр Калмана для медленно меняющейся величины (модель случайного блуждания).
+    q - дисперсия шума процесса (на одно обновление), r - дисперсия шума измерения.
+    Для BMP180 при OSS=3 r около 3**2 Па**2."""
+
+    def __init__(self, q: float = 0.05, r: float = 9.0):
+        if q < 0 or r <= 0:
+            raise ValueError(f"Invalid q/r values: {q}, {r}")
+        self._q = q
+        self._r = r
+        self.reset()
+
+    def reset(self):
+        self._value = None
+        self._p = 0.0
+
+    def update(self, value: float, dt: float = 1.0) -> float:
+        if not _finite(value):
+            return self._value
+        if self._value is None:
+            self._value = value
+            self._p = self._r
+            return value
+        p = self._p + self._q
+        k = p / (p + self._r)
+        self._value += k * (value - self._value)
+        self._p = (1.0 - k) * p
+        return self._value
+
+    @property
+    def value(self) -> float | None:
+        return self._value
+
+
+class FilterChain(IFilter):
+    """Цепочка фильтров: выход каждого фильтра - вход следующего. Интервал dt передается каждому фильтру,
+    поэтому скорость AlphaBetaFilter в цепочке - в ед./с, если dt задан в секундах.
+    Example:
+        >>> chain = FilterChain(MedianFilter(3), EmaFilter(0.2))
+        >>> for mp in sensor:
+        ...     print(chain.update(mp.pressure))
+    """
+
+    def __init__(self, *filters: IFilter):
+        if not filters:
+            raise ValueError("Empty filter chain")
+        self._filters = filters
+
+    def update(self, value: float, dt: float = 1.0) -> float:
+        if not _finite(value):
+            return self.value
+        for flt in self._filters:
+            value = flt.update(value, dt)
+        return value
+
+    def reset(self):
+        for flt in self._filters:
+            flt.reset()
+
+    @property
+    def value(self) -> float | None:
+        return self._filters[-1].value
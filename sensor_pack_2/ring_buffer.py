@@ -0,0 +1,112 @@
+# micropython
+# MIT license
+# Copyright (c) 2022 Roman Shevchik   goctaprog@gmail.com
+"""Кольцевой буфер фиксированного размера для измерений с метками времени.
+Память выделяется один раз, в конструкторе."""
+import array
+import time
+from micropython import const
+
+# номера каналов буфера
+TIMESTAMP = const(0)
+TEMPERATURE = const(1)
+PRESSURE = const(2)
+
+_NAN = float("nan")
+
+
+class SampleRing:
+    """Кольцевой буфер измерений: параллельные массивы метки времени (time.ticks_ms()),
+    температуры и давления. Добавление O(1), при переполнении затираются самые старые значения.
+    Отсутствующее значение (None) хранится как NaN.
+    Example:
+        >>> ring = SampleRing(256)
+        >>> ring.append(time.ticks_ms(), 25.1, 101325.0)
+        >>> older, newer = ring.views(PRESSURE, last_n=10)
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"Invalid capacity value: {capacity}")
+        self._cap = capacity
+        self._ts = array.array("L", (0 for _ in range(capacity)))
+        self._temp = array.array("f", (0 for _ in range(capacity)))
+        self._press = array.array("f", (0 for _ in range(capacity)))
+        self._channels = (self._ts, self._temp, self._press)
+        self._head = 0      # индекс для следующей записи
+        self._count = 0     # кол-во хранимых значений
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        return self._cap
+
+    def clear(self):
+        """Очищает буфер. Память не освобождается."""
+        self._head = self._count = 0
+
+    def append(self, timestamp: int, temperature: float | None, pressure: float | None):
+        """Добавляет измерение в буфер. O(1), без выделения памяти."""
+        head = self._head
+        self._ts[head] = timestamp
+        self._temp[head] = _NAN if temperature is None else temperature
+        self._press[head] = _NAN if pressure is None else pressure
+        head += 1
+        self._head = 0 if head == self._cap else head
+        if self._count < self._cap:
+            self._count += 1
+
+    def _index(self, i: int) -> int:
+        """Преобразует логический индекс (0 - самое старое значение) в индекс массива."""
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(f"Invalid index value: {i}")
+        return (self._head - self._count + i) % self._cap
+
+    def get(self, i: int) -> tuple:
+        """Возвращает (timestamp, temperature, pressure) по логическому индексу.
+        0 - самое старое значение, -1 - самое новое."""
+        j = self._index(i)
+        return self._ts[j], self._temp[j], self._press[j]
+
+    def views(self, channel: int, last_n: int | None = None) -> tuple:
+        """Возвращает два memoryview (старшие, младшие) без копирования данных, которые вместе,
+        в хронологическом порядке, содержат последние last_n значений канала channel
+        (TIMESTAMP, TEMPERATURE, PRESSURE). last_n None - все значения буфера.
+        Представления действительны до следующего вызова append."""
+        count = self._count if last_n is None else min(last_n, self._count)
+        mv = memoryview(self._channels[channel])
+        head = self._head
+        start = head - count
+        if start >= 0:
+            return mv[start:head], mv[0:0]
+        return mv[self._cap + start:], mv[:head]
+
+    def count_since(self, period_ms: int, now: int | None = None) -> int:
+        """Возвращает кол-во последних значений с меткой времени не старше period_ms мс
+        относительно now (None - time.ticks_ms()). Двоичный поиск, O(log n)."""
+        if now is None:
+            now = time.ticks_ms()
+        ts, cap, first = self._ts, self._cap, self._head - self._count
+        lo, hi = 0, self._count     # ищу первый логический индекс, попадающий в окно
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if time.ticks_diff(now, ts[(first + mid) % cap]) > period_ms:
+                lo = mid + 1
+            else:
+                hi = mid
+        return self._count - lo
+
+    def mean(self, channel: int, last_n: int | None = None) -> float:
+        """Возвращает среднее значение канала channel по последним last_n значениям.
+        NaN (отсутствующие значения) пропускаются."""
+        total, count = 0.0, 0
+        for mv in self.views(channel, last_n):
+            for val in mv:
+                if val == val:  # не NaN
+                    total += val
+                    count += 1
+        return total / count if count else _NAN